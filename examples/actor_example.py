@@ -5,6 +5,7 @@ When derived from this class announces itself as a CCU, similar to Neptus, and c
 The event loop is based on asyncio. Interactions with asyncio is done through the decorators.
 @Subscribe adds a subscriber to a certain IMC message
 @Periodic adds a function to be run periodically by the event loop.
+If uvloop is installed, it is used as the event loop automatically.
 """
 
 import logging
@@ -13,10 +14,13 @@ from typing import Tuple
 
 import pyimc
 from pyimc.actors.dynamic import DynamicActor
+from pyimc.coordinates import jit
 from pyimc.decorators import Periodic, Subscribe
 
 
 class ExampleActor(DynamicActor):
+    __slots__ = ('last_pos', 'total_dist')
+
     def __init__(self, target_name):
         """
         Initialize the actor
@@ -25,6 +29,7 @@ class ExampleActor(DynamicActor):
         super().__init__()
 
         self.last_pos = None  # type: Tuple[float, float, float]
+        self.total_dist = 0.0  # Distance moved since the first EstimatedState (meters)
 
         # This list contains the target systems to maintain communications with
         self.heartbeat.append(target_name)
@@ -44,8 +49,11 @@ class ExampleActor(DynamicActor):
 
         if self.last_pos:
             # Compute the distance between the current and previous EstimatedState
-            dist = pyimc.coordinates.WGS84.distance(*self.last_pos, lat, lon, hae)
-            logging.info('The target system moved {} meters since last EstimatedState message.'.format(dist))
+            # The scalar jit kernel avoids the call overhead of the bindings (compiled if numba is installed)
+            dist = jit.distance(*self.last_pos, lat, lon, hae)
+            self.total_dist += dist
+            logging.info('The target system moved %s meters since last EstimatedState message (%s meters in total).',
+                         dist, self.total_dist)
 
         self.last_pos = (lat, lon, hae)
 
@@ -2,114 +2,150 @@ import logging, math, sys
 
 import pyimc
 from pyimc.actors import DynamicActor
+from pyimc.coordinates import jit
 from pyimc.decorators import Subscribe, Periodic
 
 logger = logging.getLogger('examples.FollowRef')
 
+# Reference flags (see IMC spec for explanation), resolved once instead of on every reference
+_FLAGS_LOC = int(pyimc.Reference.FlagsBits.LOCATION)
+_FLAGS_SPEED = int(pyimc.Reference.FlagsBits.SPEED)
+_FLAGS_Z = int(pyimc.Reference.FlagsBits.Z)
+_FLAGS_MANDONE = int(pyimc.Reference.FlagsBits.MANDONE)
+_FLAGS_BASE = _FLAGS_LOC | _FLAGS_SPEED | _FLAGS_Z
+
 
 class FollowRef(DynamicActor):
+    __slots__ = ('target', 'state', 'estate', 'last_ref', 'wp', 'wp_next', 'target_node',
+                 'target_id', 'ref', 'start_plan')
+
     def __init__(self, target):
         super().__init__()
         self.target = target
         self.heartbeat.append(target)
         self.state = None
-        self.lat = 0.0
-        self.lon = 0.0
-        self.last_ref = False
-        self.wp = [(50., 0.), (0.0, 50.), (-50, 0.), (0., -50.)]  # North/east offsets for waypoints
+        self.estate = None  # type: pyimc.EstimatedState  # Converted to lat/lon only when needed
+        self.last_ref = None  # type: pyimc.Reference  # Resent periodically until the next reference
+        # North/east offsets for waypoints (relative to the current position when the reference is sent)
+        self.wp = ((50., 0.), (0., 50.), (-50., 0.), (0., -50.))
         self.wp_next = 0
 
-    def send_reference(self, node_id, final=False):
+        # The target node is cached when it connects, and cleared when it disconnects
+        self.target_node = None  # type: IMCNode
+        self.target_id = -1  # IMC address of the target, compared against msg.src (-1 when not connected)
+
+        # The outgoing messages are built once, only the changing fields are set before sending
+        self.ref = self.build_reference()
+        self.start_plan = self.build_start_plan()
+
+    @staticmethod
+    def build_reference():
+        """
+        Build the Reference message template (constant z and speed)
+        """
+        r = pyimc.Reference()
+
+        # Assign z
+        dz = pyimc.DesiredZ()
+        dz.value = 0.0
+        dz.z_units = pyimc.ZUnits.DEPTH
+        r.z = dz
+
+        # Assign the speed
+        ds = pyimc.DesiredSpeed()
+        ds.value = 1.6
+        ds.speed_units = pyimc.SpeedUnits.METERS_PS
+        r.speed = ds
+
+        return r
+
+    @staticmethod
+    def build_start_plan():
+        """
+        Build the PlanControl message that starts the FollowReferenceManeuver
+        """
+        fr = pyimc.FollowReference()
+        fr.control_src = 0xFFFF  # Controllable from all IMC adresses
+        fr.control_ent = 0xFF  # Controllable from all entities
+        fr.timeout = 10.0  # Maneuver stops when time since last Reference message exceeds this value
+        fr.loiter_radius = 0  # Default loiter radius when waypoint is reached
+        fr.altitude_interval = 0
+
+        # Add to PlanManeuver message
+        pman = pyimc.PlanManeuver()
+        pman.data = fr
+        pman.maneuver_id = 'FollowReferenceManeuver'
+
+        # Add to PlanSpecification
+        spec = pyimc.PlanSpecification()
+        spec.plan_id = 'FollowReference'
+        spec.maneuvers.extend([pman])
+        spec.start_man_id = 'FollowReferenceManeuver'
+        spec.description = 'A test plan sent from pyimc'
+
+        # Start plan
+        pc = pyimc.PlanControl()
+        pc.type = pyimc.PlanControl.TypeEnum.REQUEST
+        pc.op = pyimc.PlanControl.OperationEnum.START
+        pc.plan_id = 'FollowReference'
+        pc.arg = spec
+
+        return pc
+
+    def on_connect(self, node_id):
+        if node_id[1] == self.target:
+            self.target_node = self.resolve_node_id(node_id)
+            self.target_id = node_id[0]
+
+    def on_disconnect(self, node_id):
+        if node_id[1] == self.target:
+            self.target_node = None
+            self.target_id = -1
+
+    def send_reference(self, final=False):
         """
         After the FollowReferenceManeuver is started, references must be sent continously
         """
-        try:
-            next_coord = self.wp[self.wp_next % len(self.wp)]
-            lat, lon = pyimc.coordinates.WGS84.displace(self.lat, self.lon, n=next_coord[0], e=next_coord[1])
-            self.wp_next += 1
-
-            node = self.resolve_node_id(node_id)
-            r = pyimc.Reference()
-            r.lat = lat  # Target waypoint
-            r.lon = lon  # Target waypoint
-
-            # Assign z
-            dz = pyimc.DesiredZ()
-            dz.value = 0.0
-            dz.z_units = pyimc.ZUnits.DEPTH
-            r.z = dz
-
-            # Assign the speed
-            ds = pyimc.DesiredSpeed()
-            ds.value = 1.6
-            ds.speed_units = pyimc.SpeedUnits.METERS_PS
-            r.speed = ds
-
-            # Bitwise flags (see IMC spec for explanation)
-            flags = pyimc.Reference.FlagsBits.LOCATION | pyimc.Reference.FlagsBits.SPEED | pyimc.Reference.FlagsBits.Z
-            flags = flags | pyimc.Reference.FlagsBits.MANDONE if final else flags
-            r.flags = flags
-            logger.info('Sending reference')
-            self.last_ref = r
-            self.send(node, r)
-        except KeyError:
-            pass
+        node = self.target_node
+        if node is None or self.estate is None:
+            return
+
+        # Displace the current position with the next offset (scalar jit kernel, compiled if numba is installed)
+        wp_n, wp_e = self.wp[self.wp_next % len(self.wp)]
+        lat, lon, _ = pyimc.coordinates.toWGS84(self.estate)
+        lat, lon = jit.displace(lat, lon, wp_n, wp_e)
+        self.wp_next += 1
+
+        r = self.ref
+        r.lat = lat  # Target waypoint
+        r.lon = lon  # Target waypoint
+
+        r.flags = _FLAGS_BASE | _FLAGS_MANDONE if final else _FLAGS_BASE
+        logger.info('Sending reference')
+        self.send(node, r)
+        self.last_ref = r
 
     def is_from_target(self, msg):
         """
         Check that incoming message is from the target system
         """
-        try:
-            node = self.resolve_node_id(msg)
-            return node.sys_name == self.target
-        except KeyError:
-            return False
+        return msg.src == self.target_id
 
     @Periodic(10)
     def init_followref(self):
         """
         If target is connected, start the FollowReferenceManeuver
         """
-        if not self.state:
-            # Check if target system is connected
-            try:
-                node = self.resolve_node_id(self.target)
-                fr = pyimc.FollowReference()
-                fr.control_src = 0xFFFF  # Controllable from all IMC adresses
-                fr.control_ent = 0xFF  # Controllable from all entities
-                fr.timeout = 10.0  # Maneuver stops when time since last Reference message exceeds this value
-                fr.loiter_radius = 0  # Default loiter radius when waypoint is reached
-                fr.altitude_interval = 0
-
-                # Add to PlanManeuver message
-                pman = pyimc.PlanManeuver()
-                pman.data = fr
-                pman.maneuver_id = 'FollowReferenceManeuver'
-
-                # Add to PlanSpecification
-                spec = pyimc.PlanSpecification()
-                spec.plan_id = 'FollowReference'
-                spec.maneuvers.append(pman)
-                spec.start_man_id = 'FollowReferenceManeuver'
-                spec.description = 'A test plan sent from pyimc'
-
-                # Start plan
-                pc = pyimc.PlanControl()
-                pc.type = pyimc.PlanControl.TypeEnum.REQUEST
-                pc.op = pyimc.PlanControl.OperationEnum.START
-                pc.plan_id = 'FollowReference'
-                pc.arg = spec
-
-                self.send(node, pc)
-
-                logger.info('Started FollowRef command')
-            except KeyError:
-                pass
+        # Check if target system is connected
+        node = self.target_node
+        if not self.state and node is not None:
+            self.send(node, self.start_plan)
+            logger.info('Started FollowRef command')
 
     @Subscribe(pyimc.EstimatedState)
     def recv_estate(self, msg):
         if self.is_from_target(msg):
-            self.lat, self.lon, _ = pyimc.coordinates.toWGS84(msg)
+            self.estate = msg
 
     @Subscribe(pyimc.FollowRefState)
     def recv_followrefstate(self, msg: pyimc.FollowRefState):
@@ -125,11 +161,11 @@ class FollowRef(DynamicActor):
             if msg.proximity & pyimc.FollowRefState.ProximityBits.XY_NEAR:
                 # Near XY - send next reference
                 logger.info('-- Near XY')
-                self.send_reference(node_id=self.target)
+                self.send_reference()
         elif msg.state in (pyimc.FollowRefState.StateEnum.LOITER, pyimc.FollowRefState.StateEnum.HOVER, pyimc.FollowRefState.StateEnum.WAIT):
             # Loitering/hovering/waiting - send next reference
             logger.info('Waiting')
-            self.send_reference(node_id=self.target)
+            self.send_reference()
         elif msg.state == pyimc.FollowRefState.StateEnum.ELEVATOR:
             # Moving in z-direction after reaching reference cylinder
             logger.info('Elevator')
@@ -139,11 +175,9 @@ class FollowRef(DynamicActor):
 
     @Periodic(1.0)
     def periodic_ref(self):
-        if self.last_ref:
-            try:
-                self.send(self.target, self.last_ref)
-            except KeyError:
-                pass
+        if self.last_ref and self.target_node is not None:
+            # Resent with a new timestamp, such that the reference is not considered stale
+            self.send(self.target_node, self.last_ref)
 
 if __name__ == '__main__':
     # Setup logging level and console output
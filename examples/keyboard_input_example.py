@@ -4,18 +4,23 @@ Illustrates how to run an actor which responds to console input (e.g. over ssh).
 
 
 import logging
+import os
 import sys
+from contextlib import suppress
 from typing import Tuple
 import asyncio
 
 import pyimc
 from pyimc.actors.dynamic import DynamicActor
+from pyimc.coordinates import displace_fast
 from pyimc.decorators import Subscribe, RunOnce
 
 logger = logging.getLogger('examples.KeyboardActor')
 
 
 class KeyboardActor(DynamicActor):
+    __slots__ = ('target_name', 'estate', 'target_node', 'target_id', 'stdin_buf')
+
     def __init__(self, target_name):
         """
         Initialize the actor
@@ -25,15 +30,28 @@ class KeyboardActor(DynamicActor):
         self.target_name = target_name
         self.estate = None
 
+        # The target node is cached when it connects, and cleared when it disconnects
+        self.target_node = None  # type: IMCNode
+        self.target_id = -1  # IMC address of the target, compared against msg.src (-1 when not connected)
+
+        # Console input that has not been terminated by a newline yet
+        self.stdin_buf = b''
+
         # This list contains the target systems to maintain communications with
         self.heartbeat.append(target_name)
 
+    def on_connect(self, node_id):
+        if node_id[1] == self.target_name:
+            self.target_node = self.resolve_node_id(node_id)
+            self.target_id = node_id[0]
+
+    def on_disconnect(self, node_id):
+        if node_id[1] == self.target_name:
+            self.target_node = None
+            self.target_id = -1
+
     def from_target(self, msg):
-        try:
-            node = self.resolve_node_id(msg)
-            return node.name == self.target_name
-        except KeyError:
-            return False
+        return msg.src == self.target_id
 
     @Subscribe(pyimc.EstimatedState)
     def recv_estate(self, msg: pyimc.EstimatedState):
@@ -49,12 +67,12 @@ class KeyboardActor(DynamicActor):
             self.stop()
         elif line == 'stop':
             # Stop vehicle
-            try:
+            if self.target_node is None:
+                logger.error('Failed to send abort')
+            else:
                 logger.info('Aborting...')
                 abort = pyimc.Abort()
-                self.send(self.target_name, abort)
-            except KeyError:
-                logger.error('Failed to send abort')
+                self.send(self.target_node, abort)
         elif line == 'start':
             # Send vehicle 100 meters north of its current position
             if self.estate is None:
@@ -68,7 +86,7 @@ class KeyboardActor(DynamicActor):
                 man = pyimc.Goto()
                 man.z = 0.0
                 man.z_units = pyimc.ZUnits.DEPTH
-                man.lat, man.lon = pyimc.coordinates.WGS84.displace(lat, lon, n=100.0, e=0.0)
+                man.lat, man.lon = displace_fast(lat, lon, 100.0, 0.0)
                 man.speed = 1.2
                 man.speed_units = pyimc.SpeedUnits.METERS_PS
 
@@ -80,7 +98,7 @@ class KeyboardActor(DynamicActor):
                 # Add to PlanSpecification
                 spec = pyimc.PlanSpecification()
                 spec.plan_id = 'TestPlan'
-                spec.maneuvers.append(pman)
+                spec.maneuvers.extend([pman])
                 spec.start_man_id = 'TestManeuver'
                 spec.description = 'A test plan sent from pyimc'
 
@@ -95,18 +113,46 @@ class KeyboardActor(DynamicActor):
         else:
             logger.error('Unknown command')
 
+    def stop(self):
+        # Stop listening to stdin before the event loop is stopped
+        with suppress(NotImplementedError):
+            self._loop.remove_reader(sys.stdin.fileno())
+        super().stop()
+
+    def _console_lines(self, lines):
+        for line in lines:
+            try:
+                self.on_console(line.strip())
+            except Exception as e:
+                self.on_exception(loc=self.on_console.__qualname__, exc=e)
+
+    def _on_stdin_ready(self):
+        # Read everything that is available from the file descriptor. Reading through sys.stdin would buffer
+        # the remaining lines of a paste/pipe in Python, and the selector would not report them as readable again
+        fd = sys.stdin.fileno()
+        data = os.read(fd, 4096)
+        if data:
+            # Keep the incomplete last line until the rest of it arrives
+            *lines, self.stdin_buf = (self.stdin_buf + data).split(b'\n')
+        else:
+            # End of input (e.g. piped stdin), stop watching the file descriptor
+            self._loop.remove_reader(fd)
+            lines, self.stdin_buf = [self.stdin_buf], b''
+
+        self._console_lines(line.decode(errors='replace') for line in lines if line)
+
     @RunOnce()
     async def aio_readline(self):
         try:
+            # Watch stdin from the event loop, rather than waiting on it from an executor thread
+            self._loop.add_reader(sys.stdin.fileno(), self._on_stdin_ready)
+        except NotImplementedError:
+            # add_reader is not supported by the Windows Proactor event loop, read lines from an executor thread
             while True:
-                # TODO: this causes the stop() function to hang, as run_in_executor is not cancelled
-                #       and waits for the next keyboard input before returning. Consider using
-                #       the aioconsole package instead.
-                rd = await self._loop.run_in_executor(None, sys.stdin.readline)
-                for line in rd.splitlines():
-                    self.on_console(line.strip())
-        except RuntimeError:
-            pass
+                line = await self._loop.run_in_executor(None, sys.stdin.readline)
+                if not line:
+                    break
+                self._console_lines([line])
 
 
 if __name__ == '__main__':
@@ -11,6 +11,8 @@ from pyimc.decorators import Periodic, Subscribe
 
 
 class PlanActor(DynamicActor):
+    __slots__ = ('target', 'db_reqid', 'target_node', 'target_id')
+
     def __init__(self, target_name):
         """
         Initialize the actor
@@ -22,9 +24,23 @@ class PlanActor(DynamicActor):
         self.target = target_name
         self.db_reqid = 0  # Optional number that is incremented for requests
 
+        # The target node is cached when it connects, and cleared when it disconnects
+        self.target_node = None  # type: IMCNode
+        self.target_id = -1  # IMC address of the target, compared against msg.src (-1 when not connected)
+
         # This list contains the target systems to maintain communications with
         self.heartbeat.append(target_name)
 
+    def on_connect(self, node_id):
+        if node_id[1] == self.target:
+            self.target_node = self.resolve_node_id(node_id)
+            self.target_id = node_id[0]
+
+    def on_disconnect(self, node_id):
+        if node_id[1] == self.target:
+            self.target_node = None
+            self.target_id = -1
+
     @Periodic(10.0)
     def req_plandb(self):
         """
@@ -32,46 +48,38 @@ class PlanActor(DynamicActor):
         :return: None
         """
         # Check if target system is currently connected
-        try:
-            # This function resolves the map of connected nodes
-            node = self.resolve_node_id(self.target)
-
-            # Request the PlanDB state
-            logging.debug("Requesting PlanDB state from target.")
-            db_req = pyimc.PlanDB()
-
-            # Enumerations are exposed as a subclass of the message
-            db_req.type = pyimc.PlanDB.TypeEnum.REQUEST
-            db_req.op = pyimc.PlanDB.OperationEnum.GET_STATE  # Note: DSTATE does not seem to work as intended
-            db_req.request_id = self.db_reqid
-            self.db_reqid += 1
+        node = self.target_node
+        if node is None:
+            logging.debug('Target system is not connected.')
+            return
 
-            # Send the IMC message to the node
-            self.send(node, db_req)
+        # Request the PlanDB state
+        logging.debug("Requesting PlanDB state from target.")
+        db_req = pyimc.PlanDB()
 
-        except KeyError as e:
-            # Target system is not connected
-            logging.debug('Target system is not connected.')
+        # Enumerations are exposed as a subclass of the message
+        db_req.type = pyimc.PlanDB.TypeEnum.REQUEST
+        db_req.op = pyimc.PlanDB.OperationEnum.GET_STATE  # Note: DSTATE does not seem to work as intended
+        db_req.request_id = self.db_reqid
+        self.db_reqid += 1
 
+        # Send the IMC message to the node
+        self.send(node, db_req)
 
     @Subscribe(pyimc.PlanDB)
     def recv_plandb(self, msg: pyimc.PlanDB):
-        try:
-            # Check if message originates from the target system
-            node = self.resolve_node_id(self.target)
-            if msg.src == node.id:
-                # Check for a successful PlanDB request of the correct type
-                if msg.type == pyimc.PlanDB.TypeEnum.SUCCESS and msg.op == pyimc.PlanDB.OperationEnum.GET_STATE:
-                    dbstate = msg.arg  # type: pyimc.PlanDBState
-
-                    # The IMC MessageList type interface is designed to be as close to a python list as possible
-                    # It has support for iteration, indexing, slicing, append, extend, len, in
-                    # The caveat is that it cannot be assigned to from a list (use append, clear, extend instead)
+        # Check if message originates from the target system
+        if msg.src == self.target_id:
+            # Check for a successful PlanDB request of the correct type
+            if msg.type == pyimc.PlanDB.TypeEnum.SUCCESS and msg.op == pyimc.PlanDB.OperationEnum.GET_STATE:
+                dbstate = msg.arg  # type: pyimc.PlanDBState
+
+                # The IMC MessageList type interface is designed to be as close to a python list as possible
+                # It has support for iteration, indexing, slicing, append, extend, len, in
+                # The caveat is that it cannot be assigned to from a list (use append, clear, extend instead)
+                if logging.getLogger().isEnabledFor(logging.INFO):
                     plan_names = [p.plan_id for p in dbstate.plans_info]
-                    logging.info('Target system has the following plans: {}'.format(plan_names))
-
-        except KeyError as e:
-            pass
+                    logging.info('Target system has the following plans: %s', plan_names)
 
 
 if __name__ == '__main__':
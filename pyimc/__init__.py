@@ -1,4 +1,4 @@
+from _pyimc import *
 import pyimc.decorators
 import pyimc.network
 import pyimc.coordinates
-from _pyimc import *
\ No newline at end of file
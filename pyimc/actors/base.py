@@ -5,22 +5,60 @@ import logging
 import tempfile
 from contextlib import suppress
 import types
+import functools
+import heapq
+import itertools
+from typing import Any, Callable, Optional
 
 import pyimc
 from pyimc.decorators import *
-from pyimc.network.udp import IMCProtocolUDP, IMCSenderUDP
+from pyimc.network.udp import IMCProtocolUDP, get_sender_socket
 from pyimc.node import IMCNode, IMCService
 from pyimc.exception import AmbiguousKeyError
 
 logger = logging.getLogger('pyimc.actors.base')
 
+# Time to wait for the sender socket when sending the remaining queued datagrams at shutdown (seconds)
+TX_FLUSH_TIMEOUT = 1.0
+
+# Write buffer of the IMC message log (messages are written to disk when it is full, and when the log is stopped)
+LOG_BUFFER_SIZE = 64 * 1024
+
+# Bound once at import, as they are used for every inbound message
+_Message = pyimc.Message
+_EL_REPORT = pyimc.EntityList.OperationEnum.REPORT
+
 
 class IMCBase:
     """
     Base class for IMC communications.
     Implements an event loop, subscriptions, IMC node bookkeeping
     """
-    def __init__(self, imc_id=0x3334, static_port=None, verbose_nodes=False, log_enable=False, log_root=None):
+    # Attributes are stored in slots for faster access from the message handlers
+    __slots__ = ('imc_id', 'static_port', 'verbose_nodes', 'log_enable', 'log_root', 'announce', 'entities', 'services',
+                 '_loop', '_task_mc', '_task_imc', '_subs', '_dispatch', '_dispatch_default',
+                 '_dispatch_unhandled', '_timers', '_timer_seq',
+                 '_port_imc', '_port_mc', '_nodes', '_nodes_by_src', '_nodes_by_name', '_resolvers',
+                 '_static_transports', '_tx_sock', '_tx_queue', '_tx_handle', '_tx_blocked', 't_start', 'log_dir',
+                 'log_imc_fh', 'log_console_fh', 'log_level', 'profile', 'verify_crc', '_profile')
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._decorated_methods = cls._find_decorated_methods()
+
+    @classmethod
+    def _find_decorated_methods(cls) -> Tuple[str, ...]:
+        """
+        Collects the names of the decorated (@Subscribe, @Periodic, @RunOnce) methods once per class
+        :return: The sorted method names, including those of the base classes
+        """
+        names = set()
+        for klass in cls.__mro__:
+            names.update(name for name, attr in vars(klass).items() if hasattr(attr, '_decorators'))
+        return tuple(sorted(names))
+
+    def __init__(self, imc_id=0x3334, static_port=None, verbose_nodes=False, log_enable=False, log_root=None,
+                 profile=False, verify_crc=True):
         """
         Initialize the IMC comms. Does not start the event loop until run() is called
         :param imc_id: The IMC address this node should operate under
@@ -28,6 +66,9 @@ class IMCBase:
         :param verbose_nodes: If true, the connected nodes are printed out every 10 seconds
         :param log_enable: Enable logging of incoming and outgoing IMC messages (.lsf)
         :param log_dir: Root directory for IMC logs (default: /tmp/, or equivalent)
+        :param profile: Record the execution time of @Subscribe and @Periodic functions (see get_profile)
+        :param verify_crc: Verify the CRC16 of received IMC packets. Disabling it saves the checksum computation,
+                           but corrupted packets are then only caught if the (optional) UDP checksum is enabled
         """
         # Arguments
         self.imc_id = imc_id
@@ -35,6 +76,8 @@ class IMCBase:
         self.verbose_nodes = verbose_nodes
         self.log_enable = log_enable
         self.log_root = os.path.join(tempfile.gettempdir(), 'pyimc') if log_root is None else log_root
+        self.profile = profile
+        self.verify_crc = verify_crc
 
         # Overridden in subclasses
         self.announce = None
@@ -46,6 +89,16 @@ class IMCBase:
         self._task_mc = None  # type: asyncio.Task
         self._task_imc = None  # type: asyncio.Task
         self._subs = {}  # type: Dict[Type[pyimc.Message], List[types.MethodType]]
+        # Subscribers by IMC message type, including the subscribers to all messages (pyimc.Message)
+        self._dispatch = {}  # type: Dict[Type[pyimc.Message], Tuple[types.MethodType, ...]]
+        # Subscribers to messages without type-specific subscribers (@Subscribe(pyimc.Message, unhandled=True))
+        self._dispatch_unhandled = ()  # type: Tuple[types.MethodType, ...]
+        # Subscribers called for messages that are not in the dispatch table (unhandled, then all messages)
+        self._dispatch_default = ()  # type: Tuple[types.MethodType, ...]
+
+        # Heap of (deadline, sequence number, period, function) for the @Periodic functions
+        self._timers = []  # type: List[Tuple[float, int, float, types.MethodType]]
+        self._timer_seq = itertools.count()
 
         # IMC/Multicast ports (assigned when socket is created)
         self._port_imc = None  # type: int
@@ -54,10 +107,26 @@ class IMCBase:
         # Using a map from (imc address, sys_name) to a node instance
         self._nodes = {}  # type: Dict[Tuple[int, str], IMCNode]
 
+        # Index of the node keys by imc address and by name (kept in sync by add_node/remove_node)
+        self._nodes_by_src = {}  # type: Dict[int, List[Tuple[int, str]]]
+        self._nodes_by_name = {}  # type: Dict[str, List[Tuple[int, str]]]
+
+        # Node id resolution by id type (messages are resolved by their src in resolve_node_id)
+        self._resolvers = {int: self._resolve_by_src,
+                           str: self._resolve_by_name,
+                           tuple: self._resolve_by_key,
+                           IMCNode: self._resolve_by_node}  # type: Dict[type, Callable[[Any], IMCNode]]
+
         # Static transports
         # Adding pyimc.Message transports all messages
         self._static_transports = {}  # type: Dict[Type[pyimc.Message], List[IMCService]]
 
+        # Outgoing datagrams are queued and sent once per event loop iteration on a shared socket
+        self._tx_sock = None  # type: socket.socket
+        self._tx_queue = []  # type: List[Tuple[bytes, Tuple[str, int]]]
+        self._tx_handle = None  # type: asyncio.Handle
+        self._tx_blocked = False  # Waiting for the socket to become writable (send buffer full)
+
         # Runtime data
         self.t_start = None
         self.log_dir = None  # Log directory (subdirectory of log_root)
@@ -65,6 +134,9 @@ class IMCBase:
         self.log_console_fh = None  # File handle (console/logging)
         self.log_level = logging.DEBUG
 
+        # Profiling data per function: [count, total time, max time, total queuing delay]
+        self._profile = {}  # type: Dict[str, List[float]]
+
     #
     # Private
     #
@@ -86,7 +158,7 @@ class IMCBase:
 
         # IMC message log
         logger.info('Starting file log ({})'.format(self.log_dir))
-        self.log_imc_fh = open(os.path.join(self.log_dir, 'Data.lsf'), 'wb')
+        self.log_imc_fh = open(os.path.join(self.log_dir, 'Data.lsf'), 'wb', buffering=LOG_BUFFER_SIZE)
         log_ctl = pyimc.LoggingControl()
         log_ctl.set_timestamp_now()
         log_ctl.src = self.announce.src
@@ -94,15 +166,59 @@ class IMCBase:
         log_ctl.name = dt_datestr + '/' + dt_timestr
         self.log_imc_fh.write(log_ctl.serialize())
 
+    def _queue_datagram(self, data: bytes, addr: Tuple[str, int]):
+        """
+        Queue a serialized IMC message for sending. The queue is flushed in the next event loop iteration,
+        such that all messages sent in the same iteration share one flush. Sent immediately if the loop is not running.
+        If the socket send buffer is full, messages are coalesced in the queue until the socket is writable.
+        :param data: The serialized IMC message
+        :param addr: The destination (ip, port)
+        """
+        self._tx_queue.append((data, addr))
+        if self._loop is None or not self._loop.is_running():
+            self._flush_tx_queue()
+        elif self._tx_handle is None and not self._tx_blocked:
+            self._tx_handle = self._loop.call_soon(self._flush_tx_queue)
+
+    def _flush_tx_queue(self):
+        """
+        Send all queued datagrams on the shared socket
+        """
+        if self._tx_blocked:
+            self._loop.remove_writer(self._tx_sock.fileno())
+            self._tx_blocked = False
+
+        self._tx_handle = None
+        queue, self._tx_queue = self._tx_queue, []
+
+        if self._tx_sock is None:
+            self._tx_sock = get_sender_socket()
+
+        sock = self._tx_sock
+        for i, (data, addr) in enumerate(queue):
+            try:
+                sock.sendto(data, addr)
+            except BlockingIOError:
+                if self._loop is None or not self._loop.is_running():
+                    logger.error('Failed to send message to %s: send buffer full', addr)
+                    continue
+
+                # Keep the remaining messages (and those queued meanwhile) until the socket is writable again
+                self._tx_queue[:0] = queue[i:]
+                self._tx_blocked = True
+                self._loop.add_writer(sock.fileno(), self._flush_tx_queue)
+                return
+            except OSError as e:
+                logger.error('Failed to send message to %s: %s', addr, e)
+
     def _log_stop(self):
         if self.log_imc_fh and not self.log_imc_fh.closed:
             logger.info('Stopping file log ({})'.format(self.log_dir))
-            dt = datetime.datetime.today()
             log_ctl = pyimc.LoggingControl()
             log_ctl.set_timestamp_now()
             log_ctl.src = self.announce.src
             log_ctl.op = pyimc.LoggingControl.ControlOperationEnum.STOPPED
-            log_ctl.name = dt.strftime('%Y%m%d') + '/' + dt.strftime('%H%M%S')
+            log_ctl.name = time.strftime('%Y%m%d/%H%M%S')
             self.log_imc_fh.write(log_ctl.serialize())
             self.log_imc_fh.close()
 
@@ -134,26 +250,29 @@ class IMCBase:
         """
         raise NotImplementedError('Abstract implementation')
 
+    def on_unknown_message(self, msg: pyimc.Message):
+        """
+        Called when a message without bindings is received (type(msg) is pyimc.Message).
+        Override this (or use @Subscribe(pyimc.Message, unhandled=True)) instead of subscribing to pyimc.Message
+        and filtering on the type, as those subscribers are called for every message.
+        :param msg: The message (header and message id/name only)
+        """
+        # Emit warning on IMC type without bindings
+        logger.warning('Unknown IMC message received: %s (%s) from %s', msg.msg_name, msg.msg_id, msg.src)
+
     #
     # Callable functions
     #
 
     def stop(self):
         """
-        Cancels all running tasks and stops the event loop.
+        Cancels all running tasks and stops the event loop. Can be called from other threads (e.g. signal handlers).
         :return:
         """
-        loop = self._loop
-
         logger.info('Stop called by user. Cancelling all running tasks.')
-        for task in asyncio.all_tasks(loop):
-            task.cancel()
 
-        async def exit_event_loop():
-            logger.info('Tasks cancelled. Stopping event loop.')
-            loop.stop()
-
-        asyncio.ensure_future(exit_event_loop())
+        # Tasks are cancelled from the loop thread, which is woken up if it is waiting for events
+        self._loop.call_soon_threadsafe(self._cancel_and_stop)
 
     def run(self):
         """
@@ -180,8 +299,27 @@ class IMCBase:
                 with suppress(asyncio.CancelledError):
                     self._loop.run_until_complete(task)
         finally:
+            # Stop waiting for the sender socket before the loop is closed
+            if self._tx_blocked:
+                self._loop.remove_writer(self._tx_sock.fileno())
+                self._tx_blocked = False
+            if self._tx_handle is not None:
+                self._tx_handle.cancel()
+                self._tx_handle = None
+
             self._loop.close()
 
+            # Send the datagrams still queued (e.g. from the last callbacks or stop), blocking for a limited time
+            if self._tx_queue:
+                if self._tx_sock is None:
+                    self._tx_sock = get_sender_socket()
+                self._tx_sock.settimeout(TX_FLUSH_TIMEOUT)
+                self._flush_tx_queue()
+
+            if self._tx_sock:
+                self._tx_sock.close()
+                self._tx_sock = None
+
             # Finish IMC log
             if self.log_enable:
                 self._log_stop()
@@ -192,32 +330,29 @@ class IMCBase:
         :param msg: The IMC message to post
         :return:
         """
-        # Check that message is subclass of pyimc.Message
-        # Note: messages that exists in DUNE, but has no pybind11 bindings are returned as pyimc.Message
-        class_hierarchy = inspect.getmro(type(msg))
-        if pyimc.Message in class_hierarchy:
-            # Post message of known type
-            if type(msg) is not pyimc.Message:
-                if type(msg) in self._subs:
-                    for fn in self._subs[type(msg)]:
-                        try:
-                            fn(msg)
-                        except Exception as e:
-                            self.on_exception(loc=fn.__qualname__, exc=e)
-            else:
-                # Emit warning on IMC type without bindings
-                logger.warning(
-                    'Unknown IMC message received: {} ({}) from {}'.format(msg.msg_name, msg.msg_id, msg.src))
-
-            # Post messages to functions subscribed to all messages (pyimc.Message)
-            if pyimc.Message in self._subs:
-                for fn in self._subs[pyimc.Message]:
-                    try:
-                        fn(msg)
-                    except Exception as e:
-                        self.on_exception(loc=fn.__qualname__, exc=e)
-        else:
-            logger.warning('Received message that is not subclass of pyimc.Message: {}'.format(type(msg)))
+        # Type-specific subscribers, followed by the subscribers to all messages (pyimc.Message)
+        fns = self._dispatch.get(type(msg))
+        if fns is None:
+            # Check that message is subclass of pyimc.Message
+            if not isinstance(msg, _Message):
+                logger.warning('Received message that is not subclass of pyimc.Message: %s', type(msg))
+                return
+
+            # Note: messages that exists in DUNE, but has no pybind11 bindings are returned as pyimc.Message
+            if type(msg) is _Message:
+                try:
+                    self.on_unknown_message(msg)
+                except Exception as e:
+                    self.on_exception(loc='on_unknown_message', exc=e)
+
+            # Messages without type-specific subscribers are posted to the subscribers of unhandled messages
+            fns = self._dispatch_default
+
+        for fn in fns:
+            try:
+                fn(msg)
+            except Exception as e:
+                self.on_exception(loc=fn.__qualname__, exc=e)
 
     def resolve_node_id(self, node_id: Union[int, str, Tuple[int, str], pyimc.Message, IMCNode]) -> IMCNode:
         """
@@ -230,42 +365,77 @@ class IMCBase:
         :param node_id: Can be one of the following: imcid(int), imcname(str), node(tuple(int, str)), pyimc.message
         :return: An instance of the IMCNode class
         """
-
-        # Resolve IMCNode
-        id_type = type(node_id)
-        if id_type is str or id_type is int:
-            # Type int or str: either imc name or imc id
-            # Search for keys with the name or id, raise exception if not found or ambiguous
-            idx = 0 if id_type is int else 1
-            possible_nodes = [x for x in self._nodes.keys() if x[idx] == node_id]
-            if not possible_nodes:
-                raise KeyError('Specified IMC node does not exist.')
-            elif len(possible_nodes) > 1:
-                raise AmbiguousKeyError('Specified IMC node has multiple possible choices', choices=possible_nodes)
-            else:
-                return self._nodes[possible_nodes[0]]
-        elif id_type is tuple:
-            # Type Tuple(int, str): unique identifier of both imc id and name
-            # Determine the correct order of arguments
-            if type(node_id[0]) is int and type(node_id[1]) is str:
-                return self._nodes[node_id]
-            else:
-                raise TypeError('Node id tuple must be (int, str).')
-        elif id_type is IMCNode:
-            # Resolve by an preexisting IMCNode object
-            return self.resolve_node_id((node_id.src, node_id.sys_name))
-        elif isinstance(node_id, pyimc.Message):
+        resolver = self._resolvers.get(type(node_id))
+        if resolver is not None:
+            return resolver(node_id)
+        elif isinstance(node_id, _Message):
             # Resolve by imc address in received message (equivalent to imc id)
-            return self.resolve_node_id(node_id.src)
+            return self._resolve_by_src(node_id.src)
         else:
-            raise TypeError('Expected node_id as int, str, tuple(int,str) or Message, received {}'.format(id_type))
+            raise TypeError('Expected node_id as int, str, tuple(int,str) or Message, '
+                            'received {}'.format(type(node_id)))
+
+    def _resolve_by_src(self, src: int) -> IMCNode:
+        return self._resolve_by_index(self._nodes_by_src, src)
+
+    def _resolve_by_name(self, sys_name: str) -> IMCNode:
+        return self._resolve_by_index(self._nodes_by_name, sys_name)
+
+    def _resolve_by_index(self, index, node_id) -> IMCNode:
+        # Type int or str: either imc name or imc id
+        # Search for keys with the name or id, raise exception if not found or ambiguous
+        possible_nodes = index.get(node_id)
+        if not possible_nodes:
+            raise KeyError('Specified IMC node does not exist.')
+        elif len(possible_nodes) > 1:
+            raise AmbiguousKeyError('Specified IMC node has multiple possible choices', choices=list(possible_nodes))
+        return self._nodes[possible_nodes[0]]
+
+    def _resolve_by_key(self, key: Tuple[int, str]) -> IMCNode:
+        # Type Tuple(int, str): unique identifier of both imc id and name
+        if type(key[0]) is int and type(key[1]) is str:
+            return self._nodes[key]
+        raise TypeError('Node id tuple must be (int, str).')
+
+    def _resolve_by_node(self, node: IMCNode) -> IMCNode:
+        # Resolve by an preexisting IMCNode object
+        return self._nodes[(node.src, node.sys_name)]
+
+    def try_resolve_node_id(self, node_id: Union[int, str, Tuple[int, str], pyimc.Message, IMCNode]) -> Optional[IMCNode]:
+        """
+        Variant of resolve_node_id that returns None instead of raising KeyError/AmbiguousKeyError.
+        Intended for message handlers, where an unknown sender is the common case during startup.
+        TypeError is still raised if the id parameter has an unexpected type.
+        :param node_id: Can be one of the following: imcid(int), imcname(str), node(tuple(int, str)), pyimc.message
+        :return: An instance of the IMCNode class, or None if the node is not found or ambiguous
+        """
+        id_type = type(node_id)
+        if id_type is tuple and type(node_id[0]) is int and type(node_id[1]) is str:
+            return self._nodes.get(node_id)
+        elif id_type is IMCNode:
+            return self._nodes.get((node_id.src, node_id.sys_name))
+        elif isinstance(node_id, _Message):
+            node_id, id_type = node_id.src, int
+
+        if id_type is str or id_type is int:
+            index = self._nodes_by_src if id_type is int else self._nodes_by_name
+            possible_nodes = index.get(node_id)
+            # Not found or ambiguous
+            return self._nodes[possible_nodes[0]] if possible_nodes and len(possible_nodes) == 1 else None
+
+        # Unexpected type, let resolve_node_id raise the appropriate exception
+        return self.resolve_node_id(node_id)
 
     def add_node(self, node: IMCNode):
         """
         Add an IMC node to the map.
         :param node: The node to be added to the map. The src and sys_name properties must be set
         """
-        self._nodes[(node.src, node.sys_name)] = node
+        key = (node.src, node.sys_name)
+        if key not in self._nodes:
+            self._nodes_by_src.setdefault(key[0], []).append(key)
+            self._nodes_by_name.setdefault(key[1], []).append(key)
+        self._nodes[key] = node
 
     def remove_node(self, key):
         """
@@ -273,7 +443,14 @@ class IMCBase:
         :param key: One of the supported key formats in resolve_node_id
         """
         node = self.resolve_node_id(key)
-        del self._nodes[(node.src, node.sys_name)]
+        key = (node.src, node.sys_name)
+        del self._nodes[key]
+
+        for index, k in ((self._nodes_by_src, key[0]), (self._nodes_by_name, key[1])):
+            keys = index[k]
+            keys.remove(key)
+            if not keys:
+                del index[k]
 
     def add_static_transport(self, imc_service: IMCService, msg_types: List[Type[pyimc.Message]]):
         """
@@ -283,7 +460,11 @@ class IMCBase:
         :return:
         """
         for msg_type in msg_types:
-            self._static_transports[msg_type].append(imc_service)
+            services = self._static_transports.setdefault(msg_type, [])
+
+            # Each destination is only added once per message type (duplicates would send the message twice)
+            if not any(svc.ip == imc_service.ip and svc.port == imc_service.port for svc in services):
+                services.append(imc_service)
 
     def send_static(self, msg, set_timestamp=True):
         """
@@ -297,12 +478,18 @@ class IMCBase:
         if set_timestamp:
             msg.set_timestamp_now()
 
-        for svc in self._static_transports.get(type(msg), []):
-            with IMCSenderUDP(svc.ip) as s:
-                s.send(message=msg, port=svc.port)
-        for svc in self._static_transports.get(pyimc.Message, []):
-            with IMCSenderUDP(svc.ip) as s:
-                s.send(message=msg, port=svc.port)
+        self._send_static_serialized(type(msg), pyimc.Packet.serialize(msg))
+
+    def _send_static_serialized(self, msg_type: Type[pyimc.Message], data: bytes):
+        """
+        Queue an already serialized message to the static destinations of its type
+        :param msg_type: The type of the serialized message
+        :param data: The serialized message
+        """
+        for svc in self._static_transports.get(msg_type, ()):
+            self._queue_datagram(data, (svc.ip, svc.port))
+        for svc in self._static_transports.get(_Message, ()):
+            self._queue_datagram(data, (svc.ip, svc.port))
 
     def send(self, node_id, msg, set_timestamp=True):
         """
@@ -321,42 +508,65 @@ class IMCBase:
             msg.set_timestamp_now()
 
         node = self.resolve_node_id(node_id)
-        node.send(msg, log_fh=self.log_imc_fh)
+        msg.dst = node.src
+
+        # Serialize once for all destinations
+        b = pyimc.Packet.serialize(msg)
+        if self.log_imc_fh and not self.log_imc_fh.closed:
+            self.log_imc_fh.write(b)
+
+        for addr in node.get_destinations():
+            self._queue_datagram(b, addr)
 
-        # Send to static destinations
-        self.send_static(msg)
+        # Send to static destinations (same packet)
+        self._send_static_serialized(type(msg), b)
+
+    def get_profile(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns the execution statistics of the @Subscribe and @Periodic functions (requires profile=True).
+        Coroutines are not profiled. The queuing delay is the time a periodic function was run after it was due.
+        :return: Map from function name to count, total_time, max_time and queue_time (seconds)
+        """
+        keys = ('count', 'total_time', 'max_time', 'queue_time')
+        return {name: dict(zip(keys, stats)) for name, stats in self._profile.items()}
 
     def on_exception(self, loc, exc):
         """
         Can be overridden in subclasses to handle uncaught exceptions in @Subscribe, @Periodic, @RunOnce functions
         :return:
         """
-        logger.error('Uncaught exception ({exctype}) in {loc}: {msg}'.format(loc=loc, exctype=type(exc).__qualname__, msg=exc))
+        logger.error('Uncaught exception (%s) in %s: %s', type(exc).__qualname__, loc, exc)
 
     #
     # Private
     #
 
+    def _cancel_and_stop(self):
+        loop = self._loop
+        for task in asyncio.all_tasks(loop):
+            task.cancel()
+
+        # Scheduled after the cancellations, which are processed before the loop stops
+        loop.call_soon(loop.stop)
+
     def _start_subscriptions(self):
         """
         Add asyncio datagram endpoint for all subscriptions
         """
         # Add datagram endpoint for multicast announce
-        multicast_listener = self._loop.create_datagram_endpoint(lambda: IMCProtocolUDP(self, is_multicast=True),
+        multicast_listener = self._loop.create_datagram_endpoint(lambda: IMCProtocolUDP(self, is_multicast=True,
+                                                                                        verify=self.verify_crc),
                                                                  family=socket.AF_INET)
 
         # Add datagram endpoint for UDP IMC messages
         imc_listener = self._loop.create_datagram_endpoint(lambda: IMCProtocolUDP(self,
                                                                                   is_multicast=False,
-                                                                                  static_port=self.static_port),
+                                                                                  static_port=self.static_port,
+                                                                                  verify=self.verify_crc),
                                                            family=socket.AF_INET)
 
-        if sys.version_info < (3, 4, 4):
-            self._task_mc = self._loop.create_task(multicast_listener)
-            self._task_imc = self._loop.create_task(imc_listener)
-        else:
-            self._task_mc = asyncio.ensure_future(multicast_listener)
-            self._task_imc = asyncio.ensure_future(imc_listener)
+        self._task_mc = self._loop.create_task(multicast_listener)
+        self._task_imc = self._loop.create_task(imc_listener)
 
     def _setup_event_loop(self):
         """
@@ -364,42 +574,150 @@ class IMCBase:
         """
         # Add event loop to instance
         if not self._loop:
+            # Use uvloop as the event loop if it is installed (faster datagram handling and timers)
+            try:
+                import uvloop
+                asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+            except ImportError:
+                pass
+
             self._loop = asyncio.get_event_loop()
 
-        decorated = [(name, method) for name, method in inspect.getmembers(self) if hasattr(method, '_decorators')]
+        # Decorated methods are collected per class (overrides without decorators are skipped)
+        decorated = [(name, getattr(self, name)) for name in self._decorated_methods]
+        decorated = [(name, method) for name, method in decorated if hasattr(method, '_decorators')]
+        unhandled = []  # type: List[types.MethodType]
         for name, method in decorated:
             for decorator in method._decorators:
                 decorator.add_event(self._loop, self, method)
 
                 if type(decorator) is Subscribe:
                     # Collect subscribed message types for each function
+                    # Subscribers to unhandled messages are collected separately, as they are not called for all
+                    if decorator.unhandled and pyimc.Message in decorator.subs:
+                        unhandled.append(method)
+
                     for msg_type in decorator.subs:
+                        if decorator.unhandled and msg_type is pyimc.Message:
+                            continue
+
                         try:
                             self._subs[msg_type].append(method)
                         except (KeyError, AttributeError):
                             self._subs[msg_type] = [method]
 
         # Sort subscriptions by position in inheritance hierarchy (parent classes are called first)
-        cls_hier = [x.__qualname__ for x in inspect.getmro(type(self))]
+        cls_rank = {x.__qualname__: i for i, x in enumerate(reversed(type(self).__mro__))}
+        for methods in (*self._subs.values(), unhandled):
+            methods.sort(key=lambda x: cls_rank[x.__qualname__.partition('.')[0]])
+
+        # Wrap subscribers in timing functions after sorting (no overhead when profiling is disabled)
+        if self.profile:
+            for methods in (*self._subs.values(), unhandled):
+                methods[:] = [self._profiled(fn) for fn in methods]
+
+        # Build the dispatch table keyed by IMC message type, each entry followed by the subscriptions to all messages
+        # Types are hashed by identity, which is cheaper than reading msg_id through the bindings
+        dispatch_all = tuple(self._subs.get(pyimc.Message, ()))
+        self._dispatch_unhandled = tuple(unhandled)
+        self._dispatch_default = self._dispatch_unhandled + dispatch_all
         for msg_type, methods in self._subs.items():
-            methods.sort(key=lambda x: -cls_hier.index(x.__qualname__.split('.')[0]))
+            if msg_type is pyimc.Message:
+                continue
+
+            # Received messages are always of a concrete type (supertypes would never be dispatched)
+            try:
+                pyimc.Factory.id_from_abbrev(msg_type.__name__)
+            except RuntimeError:
+                logger.warning('Subscribed type is not a concrete IMC message: %s', msg_type.__name__)
+                continue
+
+            self._dispatch[msg_type] = tuple(methods) + dispatch_all
+
+        # Run all periodic functions from a single task
+        if self._timers:
+            asyncio.ensure_future(self._periodic_driver(), loop=self._loop)
 
         # Subscriptions has been collected from all decorators
         # Add asyncio datagram endpoints to event loop
         self._start_subscriptions()
 
+    def _add_periodic(self, dt: float, fn: types.MethodType):
+        """
+        Add a function to the periodic timer heap, first called when the event loop starts
+        :param dt: The period in seconds
+        :param fn: The function to be called
+        """
+        if self.profile:
+            fn = self._profiled(fn)
+
+        heapq.heappush(self._timers, (self._loop.time(), next(self._timer_seq), dt, fn))
+
+    def _profiled(self, fn):
+        """
+        Wraps a function to record its execution time in the profile
+        :param fn: The function to be wrapped
+        :return: The wrapped function
+        """
+        stats = self._profile.setdefault(fn.__qualname__, [0, 0.0, 0.0, 0.0])
+        perf_counter = time.perf_counter
+
+        @functools.wraps(fn)
+        def profiled_fn(*args):
+            t0 = perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                dt = perf_counter() - t0
+                stats[0] += 1
+                stats[1] += dt
+                if dt > stats[2]:
+                    stats[2] = dt
+
+        return profiled_fn
+
+    async def _periodic_driver(self):
+        """
+        Calls the periodic functions in order of deadline, sleeping until the earliest one is due
+        """
+        loop = self._loop
+        timers = self._timers
+        while True:
+            deadline, seq, dt, fn = timers[0]
+            delay = deadline - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            t_exec = loop.time()
+            if self.profile:
+                self._profile[fn.__qualname__][3] += t_exec - deadline
+
+            try:
+                fn()
+            except Exception as e:
+                self.on_exception(loc=fn.__qualname__, exc=e)
+
+            # Keep a fixed rate, but do not try to catch up on missed periods
+            deadline += dt
+            if deadline < t_exec:
+                deadline = t_exec + dt
+            heapq.heapreplace(timers, (deadline, seq, dt, fn))
+
     @Periodic(65)
     def _prune_nodes(self):
         """
         Clear nodes that have not announced themselves or sent heartbeat in the past 60 seconds
         """
-        t = time.time()
+        cutoff = time.time() - 60
         rm_keys = []  # Avoid changes to dict during iteration
         for key, node in self._nodes.items():
-            has_heartbeat = type(node.t_last_heartbeat) is float and (t - node.t_last_heartbeat) < 60
-            has_announce = node.t_last_announce is not None and (t - node.t_last_announce) < 60
-            if not (has_heartbeat or has_announce) and not node.is_fixed:
-                logger.info('Connection to node "{}" timed out'.format(node))
+            if node.is_fixed:
+                continue
+
+            t_heartbeat = node.t_last_heartbeat
+            t_announce = node.t_last_announce
+            if (t_heartbeat is None or t_heartbeat <= cutoff) and (t_announce is None or t_announce <= cutoff):
+                logger.info('Connection to node "%s" timed out', node)
                 rm_keys.append(key)
 
         for key in rm_keys:
@@ -410,12 +728,12 @@ class IMCBase:
                 except NotImplementedError:
                     pass
             except (KeyError, AttributeError) as e:
-                logger.exception('Encountered exception when removing node ({})'.format(e.msg))
+                logger.exception('Encountered exception when removing node (%s)', e)
 
     @Periodic(10)
     def _print_connected_nodes(self):
         if self.verbose_nodes:
-            logger.debug('Connected nodes: {}'.format(list(self._nodes.keys())))
+            logger.debug('Connected nodes: %s', list(self._nodes.keys()))
 
     @Subscribe(pyimc.Announce)
     def _recv_announce(self, msg):
@@ -425,18 +743,19 @@ class IMCBase:
         if self.announce and msg.src == self.announce.src:
             # Is another system broadcasting our IMC id?
             if msg.sys_name != self.announce.sys_name:
-                logger.warning('Another system is announcing the same IMC id ({})'.format(msg.sys_name))
+                logger.warning('Another system is announcing the same IMC id (%s)', msg.sys_name)
             return
 
         # Update announce
         key = (msg.src, msg.sys_name)
-        try:
-            self._nodes[key].update_announce(msg)
-        except KeyError:
+        node = self._nodes.get(key)
+        if node is not None:
+            node.update_announce(msg)
+        else:
             # If the key is new, check for duplicate names/imc addresses
-            key_imcadr = [x for x in self._nodes.keys() if x[0] == key[0] or x[1] == key[1]]
+            key_imcadr = self._nodes_by_src.get(key[0], []) + self._nodes_by_name.get(key[1], [])
             if key_imcadr:
-                logger.warning('Multiple nodes are announcing the same IMC address or name: {} and {}'.format(key, key_imcadr))
+                logger.warning('Multiple nodes are announcing the same IMC address or name: %s and %s', key, key_imcadr)
 
             # New node
             self.add_node(IMCNode.from_announce(msg))
@@ -448,42 +767,43 @@ class IMCBase:
 
     @Subscribe(pyimc.Heartbeat)
     def _recv_heartbeat(self, msg):
-        try:
-            node = self.resolve_node_id(msg)
-            first_heartbeat = node.t_last_heartbeat is None
-            node.update_heartbeat()
+        node = self.try_resolve_node_id(msg)
+        if node is None:
+            logger.debug('Received heartbeat from unannounced node (%s)', msg.src)
+            return
 
-            if first_heartbeat:
-                try:
-                    self.on_first_heartbeat((node.src, node.sys_name))
-                except NotImplementedError:
-                    pass
-        except (AmbiguousKeyError, KeyError):
-            logger.debug('Received heartbeat from unannounced node ({})'.format(msg.src))
+        first_heartbeat = node.t_last_heartbeat is None
+        node.update_heartbeat()
+
+        if first_heartbeat:
+            try:
+                self.on_first_heartbeat((node.src, node.sys_name))
+            except NotImplementedError:
+                pass
 
     @Subscribe(pyimc.EntityList)
     def _recv_entity_list(self, msg):
         """
         Process received entity lists
         """
-        OpEnum = pyimc.EntityList.OperationEnum
-        if msg.op == OpEnum.REPORT:
-            try:
-                node = self.resolve_node_id(msg)
-                node.update_entity_list(msg)
-            except (AmbiguousKeyError, KeyError):
+        if msg.op == _EL_REPORT:
+            node = self.try_resolve_node_id(msg)
+            if node is None:
                 logger.debug('Unable to resolve node when updating EntityList')
+            else:
+                node.update_entity_list(msg)
 
     @Subscribe(pyimc.EntityInfo)
     def _recv_entity_info(self, msg: pyimc.EntityInfo):
         """
         Process entity info messages. Mostly for systems that does not announce EntityList
         """
-        try:
-            node = self.resolve_node_id(msg)
+        node = self.try_resolve_node_id(msg)
+        if node is not None:
             node.update_entity_id(ent_id=msg.src_ent, ent_label=msg.label)
-        except (AmbiguousKeyError, KeyError):
-            pass
+
+
+IMCBase._decorated_methods = IMCBase._find_decorated_methods()
 
 
 if __name__ == '__main__':
@@ -8,16 +8,25 @@ from pyimc.actors import IMCBase
 from pyimc.common import multicast_ip
 from pyimc.decorators import Subscribe, Periodic
 from pyimc.exception import AmbiguousKeyError
-from pyimc.network.udp import IMCSenderUDP
 from pyimc.network.utils import get_interfaces
 
 logger = logging.getLogger('pyimc.actors.dynamic')
 
+# Interval between probing the network interfaces for the announced services (seconds)
+SERVICES_PROBE_INTERVAL = 60
+
+# Bound once at import, as they are used for every EntityList message
+_EntityList = pyimc.EntityList
+_EL_QUERY = pyimc.EntityList.OperationEnum.QUERY
+_EL_REPORT = pyimc.EntityList.OperationEnum.REPORT
+
 
 class DynamicActor(IMCBase):
     """
     Actor which announces itself and maintains communication (heartbeat) with a set of specified nodes.
     """
+    __slots__ = ('heartbeat', '_heartbeat_msg', '_heartbeat_ambiguous', '_entity_list_cache', '_t_services_expiry')
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
@@ -34,25 +43,39 @@ class DynamicActor(IMCBase):
 
         # IMC nodes to send heartbeat signal to (maintaining comms)
         self.heartbeat = []  # type: List[Union[str, int, Tuple[int, str]]]
+        # Heartbeat message reused for every destination (only the header changes between sends)
+        self._heartbeat_msg = pyimc.Heartbeat()
+        # Heartbeat ids that resolved to multiple nodes (warned once until they resolve again)
+        self._heartbeat_ambiguous = set()  # type: Set[Union[str, int, Tuple[int, str]]]
+
+        # Formatted entity list and the entities it was formatted from (reformatted if self.entities changes)
+        self._entity_list_cache = (None, '')  # type: Tuple[Dict[str, int], str]
+
+        # Time when the announced services should be rebuilt from the network interfaces
+        self._t_services_expiry = 0.0
 
     @Subscribe(pyimc.EntityList)
     def _reply_entity_list(self, msg):
         """
         Respond to entity list queries
         """
-        OpEnum = pyimc.EntityList.OperationEnum
-        if msg.op == OpEnum.QUERY:
-            try:
-                node = self.resolve_node_id(msg)
+        if msg.op == _EL_QUERY:
+            node = self.try_resolve_node_id(msg)
+            if node is None:
+                logger.debug('Unable to resolve node when sending EntityList')
+                return
 
-                # Format entities into string and send back to node that requested it
+            # Format entities into string and send back to node that requested it
+            entities, ent_str = self._entity_list_cache
+            if entities != self.entities:
                 ent_lst_sorted = sorted(self.entities.items(), key=itemgetter(1))  # Sort by value (entity id)
-                ent_lst = pyimc.EntityList()
-                ent_lst.op = OpEnum.REPORT
-                ent_lst.list = ';'.join('{}={}'.format(k, v) for k, v in ent_lst_sorted)
-                self.send(node, ent_lst)
-            except (AmbiguousKeyError, KeyError):
-                logger.debug('Unable to resolve node when sending EntityList')
+                ent_str = ';'.join(f'{k}={v}' for k, v in ent_lst_sorted)
+                self._entity_list_cache = (dict(self.entities), ent_str)
+
+            ent_lst = _EntityList()
+            ent_lst.op = _EL_REPORT
+            ent_lst.list = ent_str
+            self.send(node, ent_lst)
 
     @Periodic(30)
     def _query_entity_list(self):
@@ -61,8 +84,8 @@ class DynamicActor(IMCBase):
         """
         for k, node in self._nodes.items():
             if not node.entities:
-                q_ent = pyimc.EntityList()
-                q_ent.op = pyimc.EntityList.OperationEnum.QUERY
+                q_ent = _EntityList()
+                q_ent.op = _EL_QUERY
                 self.send(node, q_ent)
 
     @Periodic(10)
@@ -74,16 +97,27 @@ class DynamicActor(IMCBase):
         # Build imc+udp string
         # TODO: Add TCP protocol for IMC
         if self._port_imc:  # Port must be ready to build IMC service string
-            self.services = ['imc+udp://{}:{}/'.format(adr[1], self._port_imc) for adr in get_interfaces()]
-            if not self.services:
-                # No external interfaces available, announce localhost/loopback
-                self.services = ['imc+udp://{}:{}/'.format(adr[1], self._port_imc) for adr in get_interfaces(False)]
-
-            self.announce.services = ';'.join(self.services)
-            with IMCSenderUDP(multicast_ip) as s:
-                self.announce.set_timestamp_now()
-                for i in range(30100, 30105):
-                    s.send(self.announce, i)
+            # Probe the interfaces periodically (and on the first announce), not on every announce
+            t = time.time()
+            if t >= self._t_services_expiry:
+                self._t_services_expiry = t + SERVICES_PROBE_INTERVAL
+                port = self._port_imc
+                services = [f'imc+udp://{adr[1]}:{port}/' for adr in get_interfaces()]
+                if not services:
+                    # No external interfaces available, announce localhost/loopback
+                    services = [f'imc+udp://{adr[1]}:{port}/' for adr in get_interfaces(False)]
+
+                # Only update the announce when the interfaces change
+                if services != self.services:
+                    self.services = services
+                    self.announce.services = ';'.join(services)
+
+            self.announce.set_timestamp_now()
+
+            # Serialize once and queue on the shared sender socket, flushed with the other outgoing messages
+            b = pyimc.Packet.serialize(self.announce)
+            for i in range(30100, 30105):
+                self._queue_datagram(b, (multicast_ip, i))
         elif (time.time() - self.t_start) > 10:
             logger.debug('IMC socket not ready')  # Socket should be ready by now.
 
@@ -92,17 +126,23 @@ class DynamicActor(IMCBase):
         """
         Send a heartbeat signal to nodes specified in self.heartbeat
         """
-        hb = pyimc.Heartbeat()
-        hb_sent = []
+        # Timestamp once per tick, shared by all destinations
+        hb = self._heartbeat_msg
+        hb.set_timestamp_now()
+        hb_sent = set()
         for node_id in self.heartbeat:
             try:
                 node = self.resolve_node_id(node_id)
+                self._heartbeat_ambiguous.discard(node_id)
 
                 # Only send hb once if multiple keys resolve to same node
-                if node not in hb_sent:
-                    self.send(node, hb)
-                    hb_sent.append(node)
+                key = (node.src, node.sys_name)
+                if key not in hb_sent:
+                    self.send(node, hb, set_timestamp=False)
+                    hb_sent.add(key)
             except AmbiguousKeyError as e:
-                logger.exception(str(e) + '({})'.format(e.choices))
+                if node_id not in self._heartbeat_ambiguous:
+                    self._heartbeat_ambiguous.add(node_id)
+                    logger.warning('Heartbeat id %s is ambiguous: %s (%s)', node_id, e, e.choices)
             except KeyError:
                 pass
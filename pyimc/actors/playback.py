@@ -2,6 +2,8 @@ import time
 import asyncio
 import logging
 import sys
+import itertools
+from typing import Iterator, List
 
 import pyimc
 from pyimc.actors.dynamic import DynamicActor
@@ -10,12 +12,16 @@ from pyimc.decorators import RunOnce, Subscribe
 
 logger = logging.getLogger('pyimc.actors.playback')
 
+# Number of messages read from the LSF file per batch
+PLAYBACK_BATCH_SIZE = 256
+
 
 class PlaybackActor(DynamicActor):
     """
     Playback actor class. Plays back an LSF file in addition to networked messages.
     Messages are dispatched according to the offset from the first message (timestamp) from that system
     """
+    __slots__ = ('lsf_path', 'speed', 'offset_time', 'start_time', '_t0', '_t0_sys')
 
     def __init__(self, lsf_path, speed: float=1.0, offset_time: bool=True, start_time: float=None):
         """
@@ -42,38 +48,67 @@ class PlaybackActor(DynamicActor):
         # Retrieve message subscription types (to skip unwanted messages)
         # LoggingControl is appended, as that is the first message (and therefore contains timestamp of local system)
         all_messages = not all([pyimc.Message in msgtype.__bases__ for msgtype in self._subs.keys()])
+        all_messages = all_messages or bool(self._dispatch_unhandled)
         msg_types = None if all_messages else list(self._subs.keys()) + [pyimc.LoggingControl]
 
-        for msg in LSFReader.read(self.lsf_path, types=msg_types):
-            try:
-                t0_sys = self._t0_sys[msg.src]
-            except KeyError:
-                self._t0_sys[msg.src] = msg.timestamp
-
-            # Time since start of log
-            t_msg = self._t0 + msg.timestamp - self._t0_sys[msg.src]
-
-            if self.offset_time:
-                msg.timestamp = t_msg
-
-            # Optional: Skip messages until given time, except core messages
-            if self.start_time and msg.timestamp < self.start_time:
-                if type(msg) is pyimc.Announce:
-                    self._recv_announce(msg)
-                elif type(msg) is pyimc.EntityList:
-                    self._recv_entity_list(msg)
-                elif type(msg) is pyimc.EntityInfo:
-                    self._recv_entity_info(msg)
-
-                continue
-
-            # Sleep until message should be posted
-            # Also important to give CPU time to other tasks
-            t_sleep = (t_msg - time.time())/self.speed if self.speed > 0 else 0
-            await asyncio.sleep(max(0, t_sleep))
-
-            # Post message to actor
-            self.post_message(msg)
+        # The file is read (and indexed) in a worker thread, one batch ahead of the messages being posted
+        loop = self._loop
+        reader = LSFReader.read(self.lsf_path, types=msg_types)
+        batch_future = loop.run_in_executor(None, _read_batch, reader)
+        try:
+            while True:
+                batch = await asyncio.shield(batch_future)
+                if not batch:
+                    break
+
+                batch_future = loop.run_in_executor(None, _read_batch, reader)
+                for msg in batch:
+                    try:
+                        t0_sys = self._t0_sys[msg.src]
+                    except KeyError:
+                        self._t0_sys[msg.src] = msg.timestamp
+
+                    # Time since start of log
+                    t_msg = self._t0 + msg.timestamp - self._t0_sys[msg.src]
+
+                    if self.offset_time:
+                        msg.timestamp = t_msg
+
+                    # Optional: Skip messages until given time, except core messages
+                    if self.start_time and msg.timestamp < self.start_time:
+                        if type(msg) is pyimc.Announce:
+                            self._recv_announce(msg)
+                        elif type(msg) is pyimc.EntityList:
+                            self._recv_entity_list(msg)
+                        elif type(msg) is pyimc.EntityInfo:
+                            self._recv_entity_info(msg)
+
+                        continue
+
+                    # Sleep until message should be posted
+                    # Messages that are already due are posted without yielding, other tasks run between batches
+                    t_sleep = (t_msg - time.time())/self.speed if self.speed > 0 else 0
+                    if t_sleep > 0:
+                        await asyncio.sleep(t_sleep)
+
+                    # Post message to actor
+                    self.post_message(msg)
+        finally:
+            # A read that is already running in the worker thread cannot be cancelled (hence the shield above), wait
+            # for it to finish before closing the generator (which closes the file)
+            if not batch_future.done():
+                await asyncio.wait((batch_future,))
+            reader.close()
+
+
+def _read_batch(reader: Iterator[pyimc.Message], n: int = PLAYBACK_BATCH_SIZE) -> List[pyimc.Message]:
+    """
+    Reads the next messages from an LSF message generator (run in a worker thread)
+    :param reader: The message generator (e.g. LSFReader.read)
+    :param n: The maximum number of messages to read
+    :return: The messages, empty when the generator is exhausted
+    """
+    return list(itertools.islice(reader, n))
 
 
 if __name__ == '__main__':
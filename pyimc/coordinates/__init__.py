@@ -1 +1,45 @@
-from _pyimc.coordinates import *
\ No newline at end of file
+import math
+from typing import Dict, Tuple
+
+from _pyimc.coordinates import *
+
+# WGS-84 ellipsoid parameters (as defined in DUNE)
+WGS84_A = 6378137.0
+WGS84_E2 = 0.00669437999013
+
+# Latitude grid (radians) for the cached linearization used by displace_fast (~0.001 degrees)
+DISPLACE_GRID = math.radians(0.001)
+_displace_cache = {}  # type: Dict[int, Tuple[float, float]]
+
+
+def _radii_of_curvature(lat):
+    """
+    Meridional and prime vertical radii of curvature at the given latitude
+    :return: Tuple of (m, n)
+    """
+    w2 = 1.0 - WGS84_E2 * math.sin(lat) ** 2
+    n = WGS84_A / math.sqrt(w2)
+    return n * (1.0 - WGS84_E2) / w2, n
+
+
+def displace_fast(lat, lon, n, e):
+    """
+    Approximate version of displace for short offsets (up to a few kilometers).
+    The meters-per-radian factors are cached per latitude bucket (DISPLACE_GRID),
+    so repeated calls near the same latitude do not evaluate any trigonometric functions.
+    :return: A tuple containing the offset latitude and longitude
+    """
+    bucket = int(round(lat / DISPLACE_GRID))
+    try:
+        m_per_rad_lat, m_per_rad_lon = _displace_cache[bucket]
+    except KeyError:
+        lat_bucket = bucket * DISPLACE_GRID
+        m, rn = _radii_of_curvature(lat_bucket)
+        m_per_rad_lat, m_per_rad_lon = m, rn * math.cos(lat_bucket)
+
+        # Vehicles move slowly, keep the cache bounded if it is used across large areas
+        if len(_displace_cache) > 1024:
+            _displace_cache.clear()
+        _displace_cache[bucket] = m_per_rad_lat, m_per_rad_lon
+
+    return lat + n / m_per_rad_lat, lon + e / m_per_rad_lon
@@ -9,6 +9,19 @@ def toWGS84(estate: pyimc.EstimatedState) -> Tuple[float, float, float]:
     """
     ...
 
+def displace_fast(lat: float, lon: float, n: float, e: float) -> Tuple[float, float]:
+    """
+    Approximate version of WGS84.displace for short offsets (up to a few kilometers).
+    The meters-per-radian factors are cached per latitude bucket (DISPLACE_GRID),
+    so repeated calls near the same latitude do not evaluate any trigonometric functions.
+    :param lat: The starting latitude
+    :param lon: The starting longitude
+    :param n: The north offset
+    :param e: The east offset
+    :return: A tuple containing the offset latitude and longitude
+    """
+    ...
+
 class WGS84:
     @staticmethod
     def distance(lat1: float, lon1: float, hae1:float, lat2: float, lon2: float, hae2: float) -> float:
@@ -0,0 +1,98 @@
+"""
+Scalar versions of the DUNE WGS84 routines, compiled with numba when it is installed.
+Avoids the Python->C++ call overhead for single coordinates in hot paths (e.g. per-message callbacks).
+Falls back to plain Python if numba is not available. All angles are in radians.
+"""
+
+import math
+
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        # No-op decorator, supports both @njit and @njit(...)
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda fn: fn
+
+from pyimc.coordinates import WGS84_A, WGS84_E2
+
+
+@njit(cache=True, fastmath=True)
+def _n_rad(lat):
+    lat_sin = math.sin(lat)
+    return WGS84_A / math.sqrt(1.0 - WGS84_E2 * lat_sin * lat_sin)
+
+
+@njit(cache=True, fastmath=True)
+def to_ecef(lat, lon, hae):
+    """
+    Convert a WGS-84 coordinate to ECEF
+    :return: Tuple of (x, y, z)
+    """
+    cos_lat = math.cos(lat)
+    rn = _n_rad(lat)
+    x = (rn + hae) * cos_lat * math.cos(lon)
+    y = (rn + hae) * cos_lat * math.sin(lon)
+    z = ((1.0 - WGS84_E2) * rn + hae) * math.sin(lat)
+    return x, y, z
+
+
+@njit(cache=True, fastmath=True)
+def from_ecef(x, y, z, tol=1e-4, max_iter=20):
+    """
+    Convert an ECEF coordinate to WGS-84 (iterative, as in DUNE)
+    :param tol: Convergence tolerance of the height above ellipsoid
+    :param max_iter: Maximum number of iterations
+    :return: Tuple of (lat, lon, hae)
+    """
+    p = math.sqrt(x * x + y * y)
+    lon = math.atan2(y, x)
+    lat = math.atan2(z / p, 0.01)
+    n = _n_rad(lat)
+    hae = p / math.cos(lat) - n
+    num = z / p
+
+    for _ in range(max_iter):
+        old_hae = hae
+        den = 1.0 - WGS84_E2 * n / (n + hae)
+        lat = math.atan(num / den)
+        n = _n_rad(lat)
+        hae = p / math.cos(lat) - n
+        if abs(hae - old_hae) <= tol:
+            break
+
+    return lat, lon, hae
+
+
+@njit(cache=True, fastmath=True)
+def distance(lat1, lon1, hae1, lat2, lon2, hae2):
+    """
+    Calculate distance between two WGS-84 coordinates (ECEF), equivalent to WGS84.distance
+    :return: scalar distance
+    """
+    x1, y1, z1 = to_ecef(lat1, lon1, hae1)
+    x2, y2, z2 = to_ecef(lat2, lon2, hae2)
+    return math.sqrt((x1 - x2)**2 + (y1 - y2)**2 + (z1 - z2)**2)
+
+
+@njit(cache=True, fastmath=True)
+def displace(lat, lon, n, e):
+    """
+    Displaces the given WGS84 coordinates with the north+east offsets, equivalent to WGS84.displace
+    :return: A tuple containing the offset latitude and longitude
+    """
+    x, y, z = to_ecef(lat, lon, 0.0)
+
+    # Geocentric latitude
+    phi = math.atan2(z, math.sqrt(x * x + y * y))
+    slon, clon = math.sin(lon), math.cos(lon)
+    sphi, cphi = math.sin(phi), math.cos(phi)
+
+    # NED offset (down = 0) in ECEF
+    x += -slon * e - clon * sphi * n
+    y += clon * e - slon * sphi * n
+    z += cphi * n
+
+    lat, lon, _ = from_ecef(x, y, z)
+    return lat, lon
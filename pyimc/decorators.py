@@ -48,6 +48,12 @@ class Periodic(IMCDecoratorBase):
         n_required_args = n_args - (len(argspec.defaults) if argspec.defaults else 0)
         assert n_required_args == 0, 'Functions decorated with @Periodic cannot have any required parameters.'
 
+        # Regular functions are run from a single timer heap in the instance, if it supports it
+        # Coroutines get their own task, as they may suspend for longer than their period
+        if not asyncio.iscoroutinefunction(fn) and hasattr(instance, '_add_periodic'):
+            instance._add_periodic(self.dt, fn)
+            return
+
         async def periodic_fn():
             # If coroutine await else call normally
             is_coroutine = asyncio.iscoroutinefunction(fn)
@@ -69,7 +75,13 @@ class Subscribe(IMCDecoratorBase):
     Subscribes to the specified IMC Messages.
     Multiple types can be specified (e.g @Subscribe(pyimc.CpuUsage, pyimc.Heartbeat)
     """
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, unhandled: bool = False, **kwargs):
+        """
+        :param args: The IMC message types to subscribe to
+        :param unhandled: Only applies to pyimc.Message. If true, the function is only called for messages that
+                          have no type-specific subscribers (instead of for every message)
+        """
+        self.unhandled = unhandled
         for arg in args:
             if arg.__module__ == '_pyimc':
                 # Add to __imcsub__
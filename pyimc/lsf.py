@@ -81,6 +81,9 @@ class LSFReader:
         self.lsf = lsf
         self.f = None  # type: io.BufferedIOBase
         self.header = IMCHeader()  # Preallocate header buffer
+        # Preallocate message buffer (largest possible IMC message), messages are deserialized from a view into it
+        self.buf = bytearray(ctypes.sizeof(IMCHeader) + 0xFFFF + ctypes.sizeof(IMCFooter))
+        self.buf_view = memoryview(self.buf)
         self.idx = {}  # type: Dict[Union[int, str], List[int]]
         self.use_index = use_index
         self.save_index = save_index
@@ -122,6 +125,15 @@ class LSFReader:
         # Return file position to before header
         self.f.seek(-ctypes.sizeof(IMCHeader), io.SEEK_CUR)
 
+    def read_packet(self) -> pyimc.Message:
+        """
+        Read and deserialize the message at the current file position (header must be peeked first).
+        The message is read into the preallocated buffer to avoid allocating bytes for every message.
+        """
+        n = self.header.size + ctypes.sizeof(IMCHeader) + ctypes.sizeof(IMCFooter)
+        n_read = self.f.readinto(self.buf_view[:n])
+        return pyimc.Packet.deserialize(self.buf_view[:n_read])
+
     def generate_index(self):
         """
         Run through the lsf-file and generate a message index (in-memory).
@@ -225,8 +237,7 @@ class LSFReader:
                 if self.header.sync != pyimc.constants.SYNC:
                     warnings.warn('Invalid synchronization number. Stopping parsing')
                     break
-                b = self.f.read(self.header.size + ctypes.sizeof(IMCHeader) + ctypes.sizeof(IMCFooter))
-                msg = pyimc.Packet.deserialize(b)
+                msg = self.read_packet()
                 yield msg
         else:
             # Reset file pointer to start of file
@@ -243,8 +254,7 @@ class LSFReader:
                     break
 
                 if msg_types is None or self.header.mgid in msg_types:
-                    b = self.f.read(self.header.size + ctypes.sizeof(IMCHeader) + ctypes.sizeof(IMCFooter))
-                    msg = pyimc.Packet.deserialize(b)
+                    msg = self.read_packet()
                     yield msg
                 else:
                     self.f.seek(ctypes.sizeof(IMCHeader) + self.header.size + ctypes.sizeof(IMCFooter), io.SEEK_CUR)
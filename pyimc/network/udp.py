@@ -1,9 +1,52 @@
-import socket, struct, asyncio, logging
+import socket, struct, asyncio, logging, threading
 import pyimc
 from pyimc.common import multicast_ip
 
 logger = logging.getLogger('pyimc.udp')
 
+# Largest possible IMC packet (size of the serialization buffer)
+MAX_PACKET_SIZE = 0xFFFF
+
+# IMC header layout (little-endian sync): sync, mgid, size, timestamp, src, src_ent, dst, dst_ent
+IMC_SYNC_LE = b'\x54\xfe'
+IMC_HEADER_SIZE = 20
+IMC_HEADER_MGID_OFFSET = 2
+IMC_HEADER_SRC_OFFSET = 14
+
+# Serialization buffer reused by IMCSenderUDP and IMCNode.send (one per thread)
+_tx_local = threading.local()
+
+
+def is_own_announce(data: bytes, announce) -> bool:
+    """
+    Checks whether a received datagram is the given announce (same src and sys_name), without deserializing it.
+    Only packets in little-endian byte order are checked, other packets return False.
+    :param data: The received datagram
+    :param announce: The announce of this node
+    """
+    if len(data) < IMC_HEADER_SIZE + 2 or data[:2] != IMC_SYNC_LE:
+        return False
+
+    mgid, = struct.unpack_from('<H', data, IMC_HEADER_MGID_OFFSET)
+    src, = struct.unpack_from('<H', data, IMC_HEADER_SRC_OFFSET)
+    if mgid != announce.msg_id or src != announce.src:
+        return False
+
+    # sys_name is the first field of the announce payload (uint16 length followed by the characters)
+    n, = struct.unpack_from('<H', data, IMC_HEADER_SIZE)
+    return data[IMC_HEADER_SIZE + 2:IMC_HEADER_SIZE + 2 + n] == announce.sys_name.encode()
+
+
+def get_serialization_buffer() -> bytearray:
+    """
+    Returns a reusable buffer for serializing outgoing messages (see pyimc.Packet.serialize_into)
+    """
+    try:
+        return _tx_local.bfr
+    except AttributeError:
+        _tx_local.bfr = bytearray(MAX_PACKET_SIZE)
+        return _tx_local.bfr
+
 
 class IMCSenderUDP:
     def __init__(self, ip_dst, local_port=None):
@@ -26,7 +69,9 @@ class IMCSenderUDP:
 
     def send(self, message, port, log_fh=None):
         if message.__module__ == '_pyimc':
-            b = pyimc.Packet.serialize(message)
+            # Serialize into the reused buffer instead of allocating a new bytes object per message
+            bfr = get_serialization_buffer()
+            b = memoryview(bfr)[:pyimc.Packet.serialize_into(message, bfr)]
             self.sock.sendto(b, (self.dst, port))
 
             if log_fh and not log_fh.closed:
@@ -34,19 +79,30 @@ class IMCSenderUDP:
         else:
             raise TypeError('Unknown message passed ({})'.format(type(message)))
 
+    def send_serialized(self, data, port):
+        """
+        Sends an already serialized IMC message (e.g. the same packet to several ports)
+        :param data: The serialized IMC message
+        :param port: The destination port
+        """
+        self.sock.sendto(data, (self.dst, port))
+
 
 class IMCProtocolUDP(asyncio.DatagramProtocol):
-    def __init__(self, instance, is_multicast=False, static_port=None):
+    def __init__(self, instance, is_multicast=False, static_port=None, verify=True):
         """
         Sets up an datagram listener for IMC messages
         :param instance: The parent object (derived from IMCBase)
         :param is_multicast: If true, the protocol listens for messages over multicast (e.g. Announce messages)
         :param static_port: Optional static port to listen on. RuntimeError is raised if port is in use.
+        :param verify: Verify the IMC CRC16 of received packets. Only disable this on networks where the UDP
+                       checksum is known to be enabled (it is optional on IPv4)
         """
         self.transport = None
         self.instance = instance
         self.is_multicast = is_multicast
         self.static_port = static_port
+        self.verify = verify
 
     def connection_made(self, transport):
         self.transport = transport
@@ -67,8 +123,12 @@ class IMCProtocolUDP(asyncio.DatagramProtocol):
                 pass
 
     def datagram_received(self, data, addr):
+        # Drop our own announces (e.g. looped back on another interface) before deserializing them
+        if self.is_multicast and self.instance.announce and is_own_announce(data, self.instance.announce):
+            return
+
         try:
-            p = pyimc.Packet.deserialize(data)
+            p = pyimc.Packet.deserialize(data, verify=self.verify)
 
             if p is not None:
                 # Log IMC message to file if enabled
@@ -77,16 +137,26 @@ class IMCProtocolUDP(asyncio.DatagramProtocol):
 
                 self.instance.post_message(p)
         except RuntimeError as e:
-            logger.error('Exception raised when deserializing message: {}'.format(e))
+            logger.error('Exception raised when deserializing message: %s', e)
 
     def error_received(self, exc):
-        logger.error('Error received: {}'.format(exc))
+        logger.error('Error received: %s', exc)
 
     def connection_lost(self, exc):
         # TODO: Reestablish connection?
         logger.debug('Lost connection {}'.format(exc))
 
 
+def get_sender_socket():
+    """
+    Create a socket for sending IMC messages (unicast or multicast)
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 10)
+    sock.setblocking(False)
+    return sock
+
+
 def get_multicast_socket(sock=None, static_port=None):
     if not sock:
         sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -2,18 +2,24 @@ import logging
 import ipaddress as ip
 from urllib.parse import urlparse
 import time
-from typing import Dict
+from typing import Dict, List, Tuple
 
-from pyimc.network.udp import IMCSenderUDP
+import pyimc
+from pyimc.network.udp import IMCSenderUDP, get_serialization_buffer
 from pyimc.network.utils import get_interfaces
 
 logger = logging.getLogger('pyimc.node')
 
+# Interval between probing the network interfaces when determining the destinations of a node (seconds)
+DESTINATIONS_PROBE_INTERVAL = 60
+
 
 class IMCService:
     """
     IMC service consisting of an ip/port and service specifier
     """
+    __slots__ = ('ip', 'port', 'scheme', 'param')
+
     @staticmethod
     def from_url(service_url):
         p = urlparse(service_url)
@@ -41,6 +47,10 @@ class IMCNode:
     """
     An IMC node consisting of it's address, services and entities.
     """
+    # One instance per connected system, accessed on every received message
+    __slots__ = ('src', 'sys_name', 'services_string', 'services', 'entities', 'service_filter', 'is_fixed',
+                 't_last_heartbeat', 't_last_announce', '_destinations', '_t_destinations_expiry')
+
     @staticmethod
     def from_announce(msg, service_filter=None, is_fixed=False):
         node = IMCNode(src=msg.src, sys_name=msg.sys_name, service_filter=service_filter, is_fixed=is_fixed)
@@ -85,6 +95,10 @@ class IMCNode:
         self.t_last_heartbeat = None  # type: float
         # Time of last announce
         self.t_last_announce = None  # type: float
+        # Destinations determined from the services (cleared when the services change)
+        self._destinations = None  # type: List[Tuple[str, int]]
+        # Time when the destinations should be determined again (the local interfaces may have changed)
+        self._t_destinations_expiry = 0.0
 
     @property
     def name(self):
@@ -119,6 +133,7 @@ class IMCNode:
         Parse the service string from an announce message to IMCService objects
         :param service_string: The service string from an announce message (protocols/ips/ports)
        """
+        self._destinations = None
         self.services = {}
         for svc in service_string.split(';'):
             s = IMCService.from_url(svc)
@@ -133,23 +148,26 @@ class IMCNode:
     def update_entity_id(self, ent_id, ent_label):
         self.entities[ent_label] = ent_id
 
-    def send(self, msg, log_fh=None):
+    def get_destinations(self):
         """
-        Sends the IMC message to the node, filling in the destination
-        :param msg: The IMC message to send
-        :param log_fh: File handle to open IMC message log file
-        :return: 
+        Determine the addresses to send IMC messages to, based on the imc+udp services of the node.
+        The result is reused until the services change, or the interfaces are probed again.
+        :return: List of (ip, port) tuples
         """
-
-        # Set destination of message to IMC ID of this node
-        msg.dst = self.src
-
+        t = time.time()
+        if self._destinations is None or t >= self._t_destinations_expiry:
+            self._destinations = self._find_destinations()
+            self._t_destinations_expiry = t + DESTINATIONS_PROBE_INTERVAL
+        return self._destinations
+
+    def _find_destinations(self):
+        # Services on the same network as one of the local interfaces are preferred, otherwise loopback is used
         try:
             imcudp_services = self.services['imc+udp']
         except KeyError:
             if not self.is_fixed:
-                logger.error('{} does not expose an imc+udp service'.format(self))
-            return
+                logger.error('%s does not expose an imc+udp service', self)
+            return []
 
         # Determine which service to send to based on ip/netmask
         # Note: this might not account for funky ip routing
@@ -158,18 +176,34 @@ class IMCNode:
             svc_ip = ip.ip_address(svc.ip)
 
             if any([svc_ip in network for network in networks]):
-                with IMCSenderUDP(svc.ip) as s:
-                    s.send(message=msg, port=svc.port, log_fh=log_fh)
-                return
+                return [(svc.ip, svc.port)]
 
         # If this point is reached no local interfaces has the target system in its netmask
         # Could be running on same system with no available interfaces
         # Send on loopback
         ports = [svc.port for svc in imcudp_services]
+        return [('127.0.0.1', port) for port in set(ports)]
+
+    def send(self, msg, log_fh=None):
+        """
+        Sends the IMC message to the node, filling in the destination
+        :param msg: The IMC message to send
+        :param log_fh: File handle to open IMC message log file
+        :return: 
+        """
+
+        # Set destination of message to IMC ID of this node
+        msg.dst = self.src
+
+        # Serialize once for all destinations (and log the message once), into the reused buffer of this thread
+        bfr = get_serialization_buffer()
+        b = memoryview(bfr)[:pyimc.Packet.serialize_into(msg, bfr)]
+        if log_fh and not log_fh.closed:
+            log_fh.write(b)
 
-        with IMCSenderUDP('127.0.0.1') as s:
-            for port in set(ports):
-                s.send(message=msg, port=port, log_fh=log_fh)
+        for dst_ip, port in self.get_destinations():
+            with IMCSenderUDP(dst_ip) as s:
+                s.send_serialized(b, port=port)
 
     def __str__(self):
         return 'IMCNode(0x{:X}, {})'.format(self.src, self.sys_name)
@@ -1,10 +1,11 @@
-import os, re, sys, platform, subprocess, shutil, urllib.request, zipfile, io, hashlib
+import os, re, sys, platform, subprocess, shutil, urllib.request, zipfile, io
 
 from setuptools import setup, Extension
 from setuptools.command.build_ext import build_ext
 from distutils.version import LooseVersion
 
 from utils.generate_bindings import IMCPybind, IMCPyi
+from utils.imc_schema import IMC
 
 
 class CMakeExtension(Extension):
@@ -78,35 +79,14 @@ class CMakeBuild(build_ext):
                 whitelist = [x.strip().lower() for x in f.readlines() if x.strip() and not x.startswith('#')]
                 print('Generating IMC bindings using whitelist.cfg.')
 
-        # Generate md5 of IMC spec
-        imc_xml = os.path.join(imc_dir, 'IMC.xml')
-        with open(imc_xml, 'rb') as f:
-            b_imc_xml = f.read()
-        md5 = hashlib.md5()
-        md5.update(b_imc_xml)
-        imc_md5 = md5.hexdigest()
-
-        # Check for previous md5 and compare
-        already_generated = False
-        md5_path = os.path.join('src', 'generated', 'imc.md5')
-        if os.path.exists(md5_path):
-            with open(md5_path, 'rt') as f:
-                imc_md5_current = f.read()
-
-            if imc_md5_current == imc_md5:
-                already_generated = True
-            else:
-                # Remove old bindings on MD5 mismatch
-                shutil.rmtree(os.path.join('src', 'generated'))
-
-        # Generate bindings if necessary
-        if not already_generated:
-            print('Generating python bindings.')
-            pb = IMCPybind(imc_xml, whitelist=whitelist)
-            pb.write_bindings()
+        # Generate bindings (skipped by the generator if the inputs are unchanged since the last run)
+        print('Generating python bindings.')
+        imc = IMC(os.path.join(imc_dir, 'IMC.xml'))  # Parsed once, shared by both generators
+        pb = IMCPybind(imc, whitelist=whitelist)
+        pb.write_bindings()
 
         print('Generating stub file for typing hints.')
-        pyi = IMCPyi(os.path.join(imc_dir, 'IMC.xml'), whitelist=whitelist)
+        pyi = IMCPyi(imc, whitelist=whitelist)
         pyi.write_pyi()
 
         print('Compiling with cmake.')
@@ -116,10 +96,6 @@ class CMakeBuild(build_ext):
         # Copy pyi file to out dir
         shutil.move('_pyimc.pyi', os.path.join(extdir, '_pyimc.pyi'))
 
-        # Build was successful, write imc md5
-        with open(md5_path, 'wt') as f:
-            f.write(imc_md5)
-
 
 
 if __name__ == '__main__':
@@ -138,7 +114,7 @@ if __name__ == '__main__':
                   'pyimc.network'],
         python_requires='>=3.6',
         install_requires=['netifaces'],
-        extras_require={'LSFExporter': ['pandas']},
+        extras_require={'LSFExporter': ['pandas'], 'JitCoordinates': ['numba'], 'uvloop': ['uvloop']},
         package_data={'': ['_pyimc.pyi'],
                       'pyimc.coordinates': ['*.pyi'],
                       'pyimc.algorithms': ['*.pyi']},
@@ -2,21 +2,81 @@
 
 #include <DUNE/IMC/Message.hpp>
 #include <DUNE/IMC/Packet.hpp>
+#include <DUNE/IMC/Factory.hpp>
+#include <DUNE/IMC/Constants.hpp>
+
+#include <algorithm>
+#include <memory>
+#include <stdexcept>
+#include <string>
 
 namespace py = pybind11;
 using namespace DUNE::IMC;
 
 
-Message* pbDeserialize(py::bytes b, Message* msg) {
+Message* deserializeUnverified(const uint8_t* bfr, uint16_t bfr_len, Message* msg) {
+    // Equivalent to Packet::deserialize, but skips the CRC16 computation over the packet.
+    // Only use for transports/storage that already protects the data (e.g. UDP checksum)
+    if (bfr_len < DUNE_IMC_CONST_HEADER_SIZE + DUNE_IMC_CONST_FOOTER_SIZE)
+        throw std::runtime_error("Buffer too short to contain an IMC packet.");
+
+    Header hdr;
+    Packet::deserializeHeader(hdr, bfr, bfr_len);
+
+    if (bfr_len < DUNE_IMC_CONST_HEADER_SIZE + hdr.size + DUNE_IMC_CONST_FOOTER_SIZE)
+        throw std::runtime_error("Buffer too short for the IMC packet payload.");
+
+    // A produced message is owned here until it is returned, so it is not leaked if deserialization throws
+    std::unique_ptr<Message> produced;
+    if (msg == nullptr) {
+        produced.reset(Factory::produce(hdr.mgid));
+        if (!produced)
+            throw std::runtime_error("Unknown IMC message id: " + std::to_string(hdr.mgid) + ".");
+        msg = produced.get();
+    }
+    else if (msg->getId() != hdr.mgid)
+        throw std::runtime_error("IMC packet does not match the given message type.");
+
+    msg->setTimeStamp(hdr.timestamp);
+    msg->setSource(hdr.src);
+    msg->setSourceEntity(hdr.src_ent);
+    msg->setDestination(hdr.dst);
+    msg->setDestinationEntity(hdr.dst_ent);
+
+    if (hdr.sync == DUNE_IMC_CONST_SYNC)
+        msg->deserializeFields(bfr + DUNE_IMC_CONST_HEADER_SIZE, hdr.size);
+    else
+        msg->reverseDeserializeFields(bfr + DUNE_IMC_CONST_HEADER_SIZE, hdr.size);
+
+    produced.release();
+    return msg;
+}
+
+Message* pbDeserialize(py::bytes b, Message* msg, bool verify) {
     // The buffer is the internal storage of the bytes. Do not modify
     char* bfr;
     ssize_t bfr_len;
     if (PYBIND11_BYTES_AS_STRING_AND_SIZE(b.ptr(), &bfr, &bfr_len))
         py::pybind11_fail("Unable to extract bytes contents");
 
+    if (!verify)
+        return deserializeUnverified((uint8_t*)bfr, bfr_len, msg);
+
     return DUNE::IMC::Packet::deserialize((uint8_t*)bfr, bfr_len, msg);
 }
 
+Message* pbDeserializeBuffer(py::buffer b, Message* msg, bool verify) {
+    // Deserialize directly from any contiguous byte buffer (bytearray, memoryview), avoiding a copy to bytes
+    py::buffer_info info = b.request();
+    if (info.ndim != 1 || info.itemsize != 1)
+        throw py::value_error("Expected a one-dimensional byte buffer.");
+
+    if (!verify)
+        return deserializeUnverified((uint8_t*)info.ptr, info.size, msg);
+
+    return DUNE::IMC::Packet::deserialize((uint8_t*)info.ptr, info.size, msg);
+}
+
 py::bytes pbSerialize(const Message* msg){
     // Allocate buffer
     ssize_t sz = msg->getSerializationSize();
@@ -33,11 +93,28 @@ py::bytes pbSerialize(const Message* msg){
     return b;
 };
 
+uint16_t pbSerializeInto(const Message* msg, py::buffer b, size_t offset){
+    // Serialize into a preallocated writable byte buffer (e.g. a reused bytearray), avoiding a new bytes object
+    py::buffer_info info = b.request(true);
+    if (info.ndim != 1 || info.itemsize != 1)
+        throw py::value_error("Expected a one-dimensional byte buffer.");
+
+    size_t sz = msg->getSerializationSize();
+    if (offset + sz > (size_t)info.size)
+        throw py::value_error("Buffer is too small for the serialized message.");
+
+    // Packet::serialize takes a 16-bit buffer size, larger buffers are limited to the largest possible IMC packet
+    uint16_t bfr_len = (uint16_t)std::min<size_t>((size_t)info.size - offset, 0xFFFF);
+    return Packet::serialize(msg, (uint8_t*)info.ptr + offset, bfr_len);
+};
+
 
 void pbPacket(py::module &m) {
     py::class_<Packet>(m, "Packet")
     // Note: take_ownership for instances that are already registered in pybind is referenced without "double owning"
-    .def_static("deserialize", &pbDeserialize, py::arg("b"), py::arg("msg") = (Message*)nullptr,  py::return_value_policy::take_ownership)
-    .def_static("serialize", &pbSerialize, py::return_value_policy::take_ownership);
+    .def_static("deserialize", &pbDeserialize, py::arg("b"), py::arg("msg") = (Message*)nullptr, py::arg("verify") = true, py::return_value_policy::take_ownership)
+    .def_static("deserialize", &pbDeserializeBuffer, py::arg("b"), py::arg("msg") = (Message*)nullptr, py::arg("verify") = true, py::return_value_policy::take_ownership)
+    .def_static("serialize", &pbSerialize, py::return_value_policy::take_ownership)
+    .def_static("serialize_into", &pbSerializeInto, py::arg("msg"), py::arg("b"), py::arg("offset") = 0);
 }
 
@@ -1,8 +1,14 @@
 import argparse
+import hashlib
+import json
 import os
 import string
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
+from typing import Dict, Set
 
-from .imc_schema import IMC
+from . import imc_schema
+from .imc_schema import IMC, IMCMessage
 
 
 # C++ template code for InlineMessage fields
@@ -47,6 +53,46 @@ v{message}.def_property("{field}",
     "{description}");
 """
 
+# C++ line templates (%-formatted, used once per field/enum value)
+class_template = '\tauto v%s = py::class_<%s, %s>(m, "%s", "%s");'
+readwrite_template = '\tv%s.def_readwrite("%s", &%s::%s);'
+enum_template = '\tpy::enum_<%s>(m, "%s", "%s")'
+bitfield_template = '\tpy::enum_<%s>(m, "%s", "%s", py::arithmetic())'
+enum_value_template = '\t\t.value("%s", %s::%s_%s)'
+inline_enum_template = '\n\tpy::enum_<%s::%s>(v%s, "%s", "%s"%s)'
+inline_enum_value_template = '\t\t.value("%s%s", %s::%s::%s_%s)'
+
+
+def enum_field_source(m, f, ftype, fattr):
+    """
+    Generate the property binding of an enumerated field (global or inline enum)
+    """
+    cppname = m.abbrev + '::' + f.name.replace(' ', '') + 'Enum' if f.is_inline_enum() else f.enum_def
+    return enumfield_template.format(message=m.abbrev, field=fattr, enum_ctype=ftype, enum=cppname, description='')
+
+
+# Emitters for field types with a dedicated binding, called with (message, field, field type, field attribute)
+field_emitters = {
+    'rawdata': lambda m, f, ftype, fattr: rawdata_template.format(message=m.abbrev, field=fattr),
+    'plaintext': lambda m, f, ftype, fattr: plaintext_template.format(message=m.abbrev, field=fattr),
+    'message': lambda m, f, ftype, fattr: inline_message_template.format(message=m.abbrev, field=fattr,
+                                                                        inline_type=f.message_type or 'Message'),
+}
+
+
+class LineWriter:
+    """
+    Writes lines to a file with the same interface and output as appending to a list and joining it with newlines
+    """
+    def __init__(self, f):
+        self.f = f
+        self.sep = ''
+
+    def append(self, line: str):
+        self.f.write(self.sep)
+        self.f.write(line)
+        self.sep = '\n'
+
 
 class IMCPybind(IMC):
     """
@@ -69,13 +115,32 @@ class IMCPybind(IMC):
         'fp64_t': 'VectorFp64',
     }
 
-    def __init__(self, imc_path, whitelist=None, out_dir='src/generated'):
+    def __init__(self, imc_path, whitelist=None, out_dir='src/generated', jobs=None, amalgamate=False):
+        """
+        :param imc_path: Path to the IMC XML specification (or a parsed IMC definition)
+        :param whitelist: Optional list of messages to generate bindings for (lower case)
+        :param out_dir: Output directory for the generated sources
+        :param jobs: Number of processes used to generate the message sources (default: 1, generated serially)
+        :param amalgamate: Write all message bindings to a single source file (faster full builds, coarser rebuilds)
+        """
         super().__init__(imc_path)
         self.odir = out_dir
-        self.whitelist = whitelist
+        self.whitelist = frozenset(whitelist) if whitelist else None
+        self.jobs = jobs if jobs else 1
+        self.amalgamate = amalgamate
+
+        # Unique message types used in MessageList<T> fields (instantiated once in pbGenerated)
+        self._msg_list_types = {f.message_type for m in self.messages for f in m.fields if f.message_type}
+        self._msg_list_types.add('Message')
         if not os.path.exists(self.odir):
             os.makedirs(self.odir)
 
+        # Content hash of each generated file (file name -> hash), used to skip rewriting unchanged files
+        self.cache_path = os.path.join(self.odir, '.cache.json')
+        self.stamp_path = os.path.join(self.odir, '.stamp')
+        self.cache = {}  # type: Dict[str, str]
+        self.written = set()  # type: Set[str]
+
     def get_vector_types(self):
         """
         Iterate over IMC specification and collect all vector types
@@ -89,12 +154,112 @@ class IMCPybind(IMC):
         return vec_type
 
     def write_bindings(self):
+        self.load_cache()
+
+        # Nothing to do if the specification, whitelist and generator are unchanged since the last run
+        stamp = self.get_stamp()
+        if self.is_up_to_date(stamp):
+            return
+
         self.write_supertypes()
         self.write_enumerations()
         self.write_bitfields()
         self.write_messages()
         self.write_generated()
 
+        self.remove_stale()
+        self.save_cache()
+
+        with open(self.stamp_path, 'wt') as f:
+            f.write(stamp)
+
+    def get_stamp(self) -> str:
+        """
+        Hash of all inputs that affect the generated sources (IMC specification, generator source and whitelist)
+        """
+        h = hashlib.blake2b(digest_size=16)
+        for path in (self.path, __file__, imc_schema.__file__):
+            with open(path, 'rb') as f:
+                h.update(f.read())
+        h.update('\n'.join(sorted(self.whitelist)).encode() if self.whitelist else b'')
+        h.update(b'amalgamate' if self.amalgamate else b'')
+        return h.hexdigest()
+
+    def is_up_to_date(self, stamp: str) -> bool:
+        """
+        Check the stamp of the previous run, and that the files it generated still exist
+        :param stamp: The stamp of the current inputs
+        """
+        try:
+            with open(self.stamp_path, 'rt') as f:
+                if f.read() != stamp:
+                    return False
+        except OSError:
+            return False
+
+        return bool(self.cache) and all(os.path.isfile(os.path.join(self.odir, x)) for x in self.cache)
+
+    def load_cache(self):
+        """
+        Load the content hashes of the previously generated files
+        """
+        try:
+            with open(self.cache_path, 'rt') as f:
+                self.cache = json.load(f)
+        except (OSError, ValueError):
+            self.cache = {}
+
+    def save_cache(self):
+        tmp_path = self.cache_path + '.tmp'
+        with open(tmp_path, 'wt') as f:
+            json.dump(self.cache, f, indent=0, sort_keys=True)
+        os.replace(tmp_path, self.cache_path)
+
+    def write_file(self, fname, content):
+        """
+        Write a generated file to the output directory, unless the existing file has the same content.
+        Unchanged files keep their modification time, such that they are not recompiled.
+        :param fname: The file name (relative to the output directory)
+        :param content: The file content
+        """
+        self.written.add(fname)
+        opath = os.path.join(self.odir, fname)
+        b = content.encode()
+        h = hashlib.blake2b(b, digest_size=16).hexdigest()
+        if self.cache.get(fname) == h and os.path.isfile(opath):
+            return
+
+        # Not in cache (or changed), compare with the file contents directly
+        try:
+            with open(opath, 'rb') as f:
+                is_changed = f.read() != b
+        except FileNotFoundError:
+            is_changed = True
+
+        if is_changed:
+            # Write to a temporary file and rename, such that an interrupted run never leaves a partial source
+            tmp_path = opath + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(b)
+            os.replace(tmp_path, opath)
+        self.cache[fname] = h
+
+    def remove_stale(self):
+        """
+        Remove generated files that are no longer part of the output (e.g. removed from the whitelist)
+        """
+        for fname in set(self.cache.keys()) - self.written:
+            with suppress(FileNotFoundError):
+                os.remove(os.path.join(self.odir, fname))
+            del self.cache[fname]
+
+        # Sources left by a run without a cache (e.g. per-message files before switching to --amalgamate).
+        # CMake globs the output directory, such that these would otherwise be compiled as duplicate symbols.
+        for fname in os.listdir(self.odir):
+            if fname.startswith('pb') and fname.endswith(('.cpp', '.hpp')) and fname not in self.written:
+                with suppress(FileNotFoundError):
+                    os.remove(os.path.join(self.odir, fname))
+
     def write_supertypes(self):
         """
         Generate the message supertypes bindings
@@ -108,9 +273,7 @@ class IMCPybind(IMC):
             s.append('\tpy::class_<{0}, Message>(m, "{0}", "Super type {1}");'.format(abbrev, abbrev))
         s.append('}')
 
-        opath = os.path.join(self.odir, 'pbSuperTypes.cpp')
-        with open(opath, 'wt') as f:
-            f.write('\n'.join(s))
+        self.write_file('pbSuperTypes.cpp', '\n'.join(s))
 
     def write_enumerations(self):
         """
@@ -124,16 +287,12 @@ class IMCPybind(IMC):
         for e in self.enumerations:
             if e.abbrev == 'Boolean':
                 continue
-            s.append('\tpy::enum_<{0}>(m, "{0}", "{1}")'.format(e.abbrev, e.name))
-
-            for v in e.values:
-                s.append('\t\t.value("{2}", {0}::{1}_{2})'.format(e.abbrev, e.prefix, v.abbrev))
-            s[-1] = s[-1] + ';'
+            s.append(enum_template % (e.abbrev, e.abbrev, e.name))
+            s.extend(tuple(enum_value_template % (v.abbrev, e.abbrev, e.prefix, v.abbrev) for v in e.values))
+            s[-1] += ';'
         s.append('}\n')
 
-        opath = os.path.join(self.odir, 'pbEnumerations.cpp')
-        with open(opath, 'wt') as f:
-            f.write('\n'.join(s))
+        self.write_file('pbEnumerations.cpp', '\n'.join(s))
 
     def write_bitfields(self):
         """
@@ -145,90 +304,89 @@ class IMCPybind(IMC):
         s.append('\nvoid pbBitfields(py::module &m) {')
 
         for e in self.bitfields:
-            s.append('\tpy::enum_<{0}>(m, "{0}", "{1}", py::arithmetic())'.format(e.abbrev, e.name))
-
-            for v in e.values:
-                s.append('\t\t.value("{2}", {0}::{1}_{2})'.format(e.abbrev, e.prefix, v.abbrev))
-            s[-1] = s[-1] + ';'
+            s.append(bitfield_template % (e.abbrev, e.abbrev, e.name))
+            s.extend(tuple(enum_value_template % (v.abbrev, e.abbrev, e.prefix, v.abbrev) for v in e.values))
+            s[-1] += ';'
         s.append('}\n')
 
-        opath = os.path.join(self.odir, 'pbBitfields.cpp')
-        with open(opath, 'wt') as f:
-            f.write('\n'.join(s))
+        self.write_file('pbBitfields.cpp', '\n'.join(s))
 
     def write_messages(self):
-        for m in self.messages:
-            if self.whitelist and m.abbrev.lower() not in self.whitelist:
-                continue
-
-            include = self.common_include + ['DUNE/IMC/Message.hpp',
-                                             'DUNE/IMC/SuperTypes.hpp',
-                                             'DUNE/IMC/Definitions.hpp',
-                                             'DUNE/IMC/Enumerations.hpp']
-            s = ['#include <{}>'.format(x) for x in include]
-            s.append('#include "../pbUtils.hpp"')
-            s.append('#include "../pbPacket.hpp"')
-            s += self.common_namespace
-
-            s.append('\nvoid pb{}(py::module &m) {{'.format(m.abbrev))
-            s.append('\tauto v{0} = py::class_<{0}, {1}>(m, "{0}", "{2}");'.format(m.abbrev, m.parent, m.name))
-            s.append('\tv{}.def(py::init<>());'.format(m.abbrev))
-            s.append('\tv{0}.def("__setstate__", &pbUnpickleMessage<{0}>);'.format(m.abbrev))
-
-            # Members
-            for f in m.fields:
-                if f.type == 'rawdata':
-                    rawdata = rawdata_template.format(message=m.abbrev, field=f.abbrev.lower())
-                    s.extend(['\t' + x for x in rawdata.splitlines()])
-                elif f.type == 'plaintext':
-                    plaintext = plaintext_template.format(message=m.abbrev, field=f.abbrev.lower())
-                    s.extend(['\t' + x for x in plaintext.splitlines()])
-                elif f.type == 'message':
-                    inline_type = f.message_type if f.message_type else 'Message'
-                    inline_message = inline_message_template.format(message=m.abbrev,
-                                                                    field=f.abbrev.lower(),
-                                                                    inline_type=inline_type)
-                    s.extend(['\t' + x for x in inline_message.splitlines()])
-                elif f.is_enum():
-                    if f.is_inline_enum():
-                        cppname = m.abbrev + '::' + f.name.replace(' ', '') + 'Enum'
-                    else:
-                        cppname = f.enum_def
-
-                    enum_field = enumfield_template.format(message=m.abbrev,
-                                                           field=f.abbrev.lower(),
-                                                           enum_ctype=f.type,
-                                                           enum=cppname,
-                                                           description='')
-
-                    s.extend(['\t' + x for x in enum_field.splitlines()])
-                else:
-                    s.append('\tv{0}.def_readwrite("{1}", &{0}::{1});'.format(m.abbrev, f.abbrev.lower()))
-
-            # Inline enums/bitfields
-            enum_fields = [f for f in m.fields if f.is_inline_enum() and (f.unit == 'Enumerated' or f.unit == 'Bitfield')]
-            for f in enum_fields:
-                e = f.get_inline_enum()
-                arit = ', py::arithmetic()' if e.is_bitfield() else ''
-                # Some enumerations start with lower case, use upper case for python name
-                pyname = string.capwords(e.name.replace('_', ' ')).replace(' ', '')
-                pyname += 'Bits' if e.is_bitfield() else 'Enum'
-                # Fields starting with digits is invalid in Python, prepend underscore
-                if pyname[0].isdigit():
-                    pyname = '_' + pyname
-                cppname = e.name.replace(' ', '') + ('Bits' if e.is_bitfield() else 'Enum')
-                s.append('\n\tpy::enum_<{0}::{1}>(v{0}, "{2}", "{3}"{4})'.format(m.abbrev, cppname, pyname, e.name, arit))
-                for v in e.values:
-                    # Fields starting with digits is invalid in Python, prepend underscore
-                    pyval = '_' + v.abbrev if v.abbrev[0].isdigit() else v.abbrev
-                    s.append('\t\t.value("{0}", {1}::{2}::{3}_{4})'.format(pyval, m.abbrev, cppname, e.prefix, v.abbrev))
-                s[-1] = s[-1] + ';'
-
-            s.append('}')
+        messages = [m for m in self.messages if not self.whitelist or m.abbrev_lower in self.whitelist]
+
+        # Optionally generate the sources in worker processes (the files are written from this process).
+        # The parsed messages are sent to the workers as is (they only hold strings, lists and tuples).
+        if self.jobs > 1 and len(messages) > 1:
+            with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+                bodies = list(executor.map(IMCPybind.message_body, messages, chunksize=16))
+        else:
+            bodies = [IMCPybind.message_body(m) for m in messages]
+
+        preamble = IMCPybind.message_preamble()
+        if self.amalgamate:
+            # One translation unit for all messages, such that the pybind11/DUNE headers are only parsed once
+            self.write_file('pbMessagesAll.cpp', '\n'.join([preamble] + bodies))
+        else:
+            for m, body in zip(messages, bodies):
+                self.write_file('pb{}.cpp'.format(m.abbrev), preamble + '\n' + body)
+
+    @staticmethod
+    def message_preamble() -> str:
+        """
+        Generate the includes and namespaces shared by the message bindings
+        """
+        include = IMCPybind.common_include + ['DUNE/IMC/Message.hpp',
+                                              'DUNE/IMC/SuperTypes.hpp',
+                                              'DUNE/IMC/Definitions.hpp',
+                                              'DUNE/IMC/Enumerations.hpp']
+        s = ['#include <{}>'.format(x) for x in include]
+        s.append('#include "../pbUtils.hpp"')
+        s.append('#include "../pbPacket.hpp"')
+        s += IMCPybind.common_namespace
+        return '\n'.join(s)
 
-            opath = os.path.join(self.odir, 'pb{}.cpp'.format(m.abbrev))
-            with open(opath, 'wt') as f:
-                f.write('\n'.join(s))
+    @staticmethod
+    def message_body(m: IMCMessage) -> str:
+        """
+        Generate the binding function for a single message
+        :param m: The message
+        :return: The C++ function definition
+        """
+        s = ['\nvoid pb{}(py::module &m) {{'.format(m.abbrev)]
+        append, extend = s.append, s.extend  # Local aliases for the per-field loops
+        abbrev = m.abbrev
+        append(class_template % (abbrev, abbrev, m.parent, abbrev, m.name))
+        append('\tv{}.def(py::init<>());'.format(abbrev))
+        append('\tv{0}.def("__setstate__", &pbUnpickleMessage<{0}>);'.format(abbrev))
+
+        # Members (fields without a dedicated emitter are plain read/write attributes)
+        for f, ftype, fattr in zip(m.fields, m.field_types, m.field_attrs):
+            emitter = field_emitters.get(ftype) or (enum_field_source if f.is_enum() else None)
+            if emitter:
+                extend(['\t' + x for x in emitter(m, f, ftype, fattr).splitlines()])
+            else:
+                append(readwrite_template % (abbrev, fattr, abbrev, fattr))
+
+        # Inline enums/bitfields
+        for i in m.enum_indices:
+            e = m.fields[i].get_inline_enum()
+            arit = ', py::arithmetic()' if e.is_bitfield() else ''
+            # Some enumerations start with lower case, use upper case for python name
+            pyname = string.capwords(e.name.replace('_', ' ')).replace(' ', '')
+            pyname += 'Bits' if e.is_bitfield() else 'Enum'
+            # Fields starting with digits is invalid in Python, prepend underscore
+            if pyname[0].isdigit():
+                pyname = '_' + pyname
+            cppname = e.name.replace(' ', '') + ('Bits' if e.is_bitfield() else 'Enum')
+            append(inline_enum_template % (abbrev, cppname, abbrev, pyname, e.name, arit))
+            # Fields starting with digits is invalid in Python, prepend underscore
+            extend(tuple(inline_enum_value_template % ('_' if v.abbrev[0].isdigit() else '', v.abbrev,
+                                                       abbrev, cppname, e.prefix, v.abbrev) for v in e.values))
+            s[-1] += ';'
+
+        append('}')
+
+        return '\n'.join(s)
 
     def write_generated(self):
         """
@@ -250,17 +408,14 @@ class IMCPybind(IMC):
 
         # Write forward declarations
         fnames = ['Enumerations', 'SuperTypes', 'Bitfields']
-        fnames += [m.abbrev for m in self.messages if not self.whitelist or m.abbrev.lower() in self.whitelist]
+        fnames += [m.abbrev for m in self.messages if not self.whitelist or m.abbrev_lower in self.whitelist]
         s.extend(['void pb{}(py::module&);'.format(x) for x in fnames])
 
         # Entry point
         s.append('\nvoid pbGenerated(py::module &m) {')
 
         # Instantiate MessageList<T>
-        msglst = [x.message_type for y in self.messages for x in y.fields if x.message_type]
-        msglst.append('Message')
-        msglst = set(msglst)  # Unique entries
-        s.extend(['\tpbMessageList<{0}>(m);'.format(ml) for ml in msglst])
+        s.extend(['\tpbMessageList<{0}>(m);'.format(ml) for ml in sorted(self._msg_list_types)])
 
         s.append('')
 
@@ -275,9 +430,7 @@ class IMCPybind(IMC):
         s.extend(['\tpb{}(m);'.format(x) for x in fnames])
         s.append('}')
 
-        opath = os.path.join(self.odir, 'pbGenerated.hpp')
-        with open(opath, 'wt') as f:
-            f.write('\n'.join(s))
+        self.write_file('pbGenerated.hpp', '\n'.join(s))
 
 
 class IMCPyi(IMC):
@@ -305,21 +458,24 @@ class IMCPyi(IMC):
 
     def __init__(self, imc_path, whitelist=None):
         super().__init__(imc_path)
-        self.whitelist = whitelist
+        self.whitelist = frozenset(whitelist) if whitelist else None
 
         self.sortby_message_dependencies()
 
         self.s = []
 
     def write_pyi(self):
-        self.write_enumerations()
-        self.write_bitfields()
-        self.write_supertypes()
-        self.write_messages()
-
-        with open('utils/imc_static.pyi', 'rt') as fi, open('_pyimc.pyi', 'wt') as fo:
+        # Written to a temporary file and renamed, such that an interrupted run never leaves a partial stub
+        with open('utils/imc_static.pyi', 'rt') as fi, open('_pyimc.pyi.tmp', 'wt') as fo:
             fo.write(fi.read())
-            fo.write('\n'.join(self.s))
+
+            # Stream the generated lines directly to the file instead of joining a list of the whole stub
+            self.s = LineWriter(fo)
+            self.write_enumerations()
+            self.write_bitfields()
+            self.write_supertypes()
+            self.write_messages()
+        os.replace('_pyimc.pyi.tmp', '_pyimc.pyi')
 
     def write_supertypes(self):
         """
@@ -354,39 +510,37 @@ class IMCPyi(IMC):
 
     def write_messages(self):
         for m in self.messages:
-            if self.whitelist and m.abbrev.lower() not in self.whitelist:
+            if self.whitelist and m.abbrev_lower not in self.whitelist:
                 continue
 
             self.s.append('class {0}({1}):'.format(m.abbrev, m.parent, m.name))
 
             # Members
-            for f in m.fields:
-                fabbr = f.abbrev.lower()
+            for f, ftype, fabbr, fmsg_type in zip(m.fields, m.field_types, m.field_attrs, m.field_msg_types):
                 inline_type = 'Message'
                 self.s.append('\t@property')
-                if f.type == 'message':
+                if ftype == 'message':
                     self.s.append('\tdef {0}(self) -> {1}: ...'.format(fabbr, inline_type))
                     self.s.append('\t@{}.setter'.format(fabbr))
                     self.s.append('\tdef {0}(self, {0}: {1}) -> None: ...'.format(fabbr, inline_type))
-                elif f.type == 'message-list':
-                    inline_type = f.message_type
+                elif ftype == 'message-list':
+                    inline_type = fmsg_type
                     self.s.append('\tdef {0}(self) -> MessageList[{1}]: ...'.format(fabbr, inline_type))
                     self.s.append('\t@{}.setter'.format(fabbr))
                     self.s.append('\tdef {0}(self, {0}: MessageList[{1}]) -> None: ...'.format(fabbr, inline_type))
-                elif f.type == 'vector':
+                elif ftype == 'vector':
                     inline_type = self.imctype_pyi[f.vector_type]
                     self.s.append('\tdef {0}(self) -> List[{1}]: ...'.format(fabbr, inline_type))
                     self.s.append('\t@{}.setter'.format(fabbr))
                     self.s.append('\tdef {0}(self, {0}: List[{1}]) -> None: ...'.format(fabbr, inline_type))
                 else:
-                    self.s.append('\tdef {}(self) -> {}: ...'.format(fabbr, self.imctype_pyi[f.type]))
+                    self.s.append('\tdef {}(self) -> {}: ...'.format(fabbr, self.imctype_pyi[ftype]))
                     self.s.append('\t@{}.setter'.format(fabbr))
-                    self.s.append('\tdef {0}(self, {0}: {1}) -> None: ...'.format(fabbr, self.imctype_pyi[f.type]))
+                    self.s.append('\tdef {0}(self, {0}: {1}) -> None: ...'.format(fabbr, self.imctype_pyi[ftype]))
 
             # Inline enums/bitfields
-            enum_fields = [f for f in m.fields if f.values and (f.unit == 'Enumerated' or f.unit == 'Bitfield')]
-            for f in enum_fields:
-                e = f.get_inline_enum()
+            for i in m.enum_indices:
+                e = m.fields[i].get_inline_enum()
                 # Some enumerations start with lower case, use upper case for python name
                 pyname = string.capwords(e.name.replace('_', ' ')).replace(' ', '')
                 pyname += 'Bits' if e.is_bitfield() else 'Enum'
@@ -397,7 +551,7 @@ class IMCPyi(IMC):
                     pyval = '_' + v.abbrev if v.abbrev[0].isdigit() else v.abbrev
                     self.s.append('\t\t{0} = None'.format(pyval))
 
-            if not m.fields and not enum_fields:
+            if not m.fields and not m.enum_indices:
                 self.s.append('\tpass')
 
             self.s.append('')
@@ -408,6 +562,10 @@ if __name__ == '__main__':
     parser.add_argument('--imc_path', type=str, required=True, help='Path to the IMC XML specification.')
     parser.add_argument('--whitelist', type=str, required=False, default=None,
                         help='Path to a text file with messages to keep (optional).')
+    parser.add_argument('--jobs', type=int, required=False, default=None,
+                        help='Number of processes used to generate the message bindings (default: 1).')
+    parser.add_argument('--amalgamate', action='store_true',
+                        help='Write all message bindings to a single source file (pbMessagesAll.cpp).')
     args = parser.parse_args()
 
     whitelist = []
@@ -419,10 +577,13 @@ if __name__ == '__main__':
             print('Whitelist passed with the following messages:')
             print(whitelist)
 
-    pb = IMCPybind(args.imc_path, whitelist=whitelist)
+    # Parse the specification once, shared by both generators
+    imc = IMC(args.imc_path)
+
+    pb = IMCPybind(imc, whitelist=whitelist, jobs=args.jobs, amalgamate=args.amalgamate)
     pb.write_bindings()
 
-    pyi = IMCPyi(args.imc_path, whitelist=whitelist)
+    pyi = IMCPyi(imc, whitelist=whitelist)
     pyi.write_pyi()
 
 
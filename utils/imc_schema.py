@@ -2,8 +2,15 @@
 Parser for the IMC.xml specification file.
 """
 
-from xml.etree import ElementTree as ET
-from typing import List
+from typing import List, Optional, Tuple
+
+# Use lxml if available (C parser), otherwise the standard library ElementTree
+try:
+    from lxml import etree as ET
+    iterparse_kwargs = {'remove_comments': True}  # ElementTree drops comments by default
+except ImportError:
+    from xml.etree import ElementTree as ET
+    iterparse_kwargs = {}
 
 # Mapping between IMC type and size
 imctype_sz = {
@@ -34,6 +41,16 @@ class IMC:
     Representation of an entire IMC definition (xml file)
     """
     def __init__(self, imc_path):
+        """
+        :param imc_path: Path to the IMC XML specification, or an already parsed IMC definition to share
+        """
+        if isinstance(imc_path, IMC):
+            # Share the parsed definition, but keep a separate message list (may be reordered by subclasses)
+            self.__dict__.update(imc_path.__dict__)
+            self.messages = list(imc_path.messages)
+            return
+
+        self.path = imc_path
         self.name = None
         self.long_name = None
         self.version = None
@@ -68,49 +85,64 @@ class IMC:
             abbrevs.add(m.abbrev)
 
     def parse(self, imc_path):
-        tree = ET.parse(imc_path)
-        root = tree.getroot()
-        self.name = root.attrib['name']
-        self.long_name = root.attrib['long-name']
-        self.version = root.attrib['version']
-        for child in root:
-            tag = child.tag
-            if tag == 'description':
-                self.description = child.text
-            elif tag == 'types':
-                self.types = [x.attrib['name'] for x in child.findall('type')]
-            elif tag == 'serialization':
-                self.serialization = [x.attrib['name'] for x in child.findall('type')]
-            elif tag == 'units':
-                self.units = {x.attrib['abbrev']: x.attrib['name'] for x in child.findall('unit')}
-            elif tag == 'enumerations':
-                self.enumerations = [IMCEnum(x) for x in child.findall('def')]
-            elif tag == 'bitfields':
-                self.bitfields = [IMCEnum(x) for x in child.findall('def')]
-                for b in self.bitfields:
-                    b.unit = 'Bitfield'
-            elif tag == 'message-groups':
-                for group in child.findall('message-group'):
-                    self.message_groups.append(
-                        (group.attrib['abbrev'], [x.attrib['abbrev'] for x in group.findall('message-type')]))
-            elif tag == 'flags':
-                self.flags = [(x.attrib['name'], x.attrib['abbrev']) for x in child.findall('flag')]
-            elif tag == 'header':
-                self.header = IMCHeader(child)
-            elif tag == 'footer':
-                self.footer = IMCFooter(child)
-            elif tag == 'groups':
-                self.groups = [IMCGroup(x) for x in child.findall('group')]
-            elif tag == 'message':
-                self.messages.append(IMCMessage(child))
-            else:
-                print('Unknown IMC tag "{}" encountered.'.format(tag))
+        # Parse incrementally, each top level element is converted and then discarded to keep memory usage low
+        root = None
+        depth = 0
+        for event, el in ET.iterparse(imc_path, events=('start', 'end'), **iterparse_kwargs):
+            if event == 'start':
+                if depth == 0:
+                    root = el
+                    self.name = root.attrib['name']
+                    self.long_name = root.attrib['long-name']
+                    self.version = root.attrib['version']
+                depth += 1
+                continue
+
+            depth -= 1
+            if depth == 1:
+                self.parse_element(el)
+                root.clear()  # Only contains elements that are already parsed
 
         # Messages in a message-group should have that supertype as a parent
+        group_by_abbrev = {child: group for group, children in self.message_groups for child in children}
         for m in self.messages:
-            for group, children in self.message_groups:
-                if m.abbrev in children:
-                    m.parent = group
+            m.parent = group_by_abbrev.get(m.abbrev, m.parent)
+
+    def parse_element(self, child):
+        """
+        Parse a top level element of the IMC specification
+        """
+        tag = child.tag
+        if tag == 'description':
+            self.description = child.text
+        elif tag == 'types':
+            self.types = [x.attrib['name'] for x in child.findall('type')]
+        elif tag == 'serialization':
+            self.serialization = [x.attrib['name'] for x in child.findall('type')]
+        elif tag == 'units':
+            self.units = {x.attrib['abbrev']: x.attrib['name'] for x in child.findall('unit')}
+        elif tag == 'enumerations':
+            self.enumerations = [IMCEnum(x) for x in child.findall('def')]
+        elif tag == 'bitfields':
+            self.bitfields = [IMCEnum(x) for x in child.findall('def')]
+            for b in self.bitfields:
+                b.unit = 'Bitfield'
+        elif tag == 'message-groups':
+            for group in child.findall('message-group'):
+                self.message_groups.append(
+                    (group.attrib['abbrev'], [x.attrib['abbrev'] for x in group.findall('message-type')]))
+        elif tag == 'flags':
+            self.flags = [(x.attrib['name'], x.attrib['abbrev']) for x in child.findall('flag')]
+        elif tag == 'header':
+            self.header = IMCHeader(child)
+        elif tag == 'footer':
+            self.footer = IMCFooter(child)
+        elif tag == 'groups':
+            self.groups = [IMCGroup(x) for x in child.findall('group')]
+        elif tag == 'message':
+            self.messages.append(IMCMessage(child))
+        else:
+            print('Unknown IMC tag "{}" encountered.'.format(tag))
 
     def sortby_message_dependencies(self):
         """
@@ -149,7 +181,7 @@ class IMCGroup:
     Defines a division of the declared IMC IDs into a predefined range (e.g sensors 250-299)
     """
     def __init__(self, el=None):
-        if el:
+        if el is not None:
             self.name = el.attrib['name']
             self.abbrev = el.attrib['abbrev']
             self.min = int(el.attrib['min'])
@@ -163,18 +195,29 @@ class IMCGroup:
 class IMCMessage:
     """
     The definition of an IMC message. Can contain one or multiple values
+    Only holds plain values (no XML elements), such that it can be pickled to worker processes.
     """
     def __init__(self, el):
         self.id = el.attrib['id']
         self.name = el.attrib['name']
         self.abbrev = el.attrib['abbrev']
+        self.abbrev_lower = self.abbrev.lower()  # Used for whitelist lookups
         self.source = el.attrib.get('source', None)
-        self.description = '\n'.join([x.text for x in el.findall('description') if x])
+        self.description = '\n'.join([x.text for x in el.findall('description') if x.text])
         self.fields = [IMCField(x) for x in el.findall('field')]  # type: List[IMCField]
         self.flags = el.attrib.get('flags', None)
         self.used_by = el.attrib.get('used-by', None)
         self.parent = 'Message'  # Default parent class
 
+        # Field properties as parallel tuples (iterated with zip by the code generators)
+        self.field_types = tuple(f.type for f in self.fields)  # type: Tuple[str, ...]
+        self.field_attrs = tuple(f.abbrev.lower() for f in self.fields)  # type: Tuple[str, ...]
+        self.field_msg_types = tuple(f.message_type for f in self.fields)  # type: Tuple[Optional[str], ...]
+
+        # Indices of the fields that define an inline enumeration/bitfield
+        self.enum_indices = tuple(i for i, f in enumerate(self.fields)
+                                  if f.values and (f.unit == 'Enumerated' or f.unit == 'Bitfield'))  # type: Tuple[int, ...]
+
     def is_variable(self) -> bool:
         return any([f.is_variable() for f in self.fields])
 
@@ -206,7 +249,7 @@ class IMCField:
         self.abbrev = el.attrib['abbrev']
         self.type = el.attrib['type']
         self.unit = el.attrib.get('unit', None)
-        self.description = '\n'.join([x.text for x in el.findall('description') if x])
+        self.description = '\n'.join([x.text for x in el.findall('description') if x.text])
         self.note = el.attrib.get('note', None)  # Rarely used
 
         # If type is message or message-list, this field designates which type these messages are
@@ -278,7 +321,7 @@ class IMCEnum:
     def __init__(self, el=None):
         self.is_inline = False
 
-        if el:
+        if el is not None:
             self.name = el.attrib['name']
             self.abbrev = el.attrib['abbrev']
             self.prefix = el.attrib['prefix']
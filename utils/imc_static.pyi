@@ -46,9 +46,11 @@ class MessageList(Sequence[T]):
 
 class Packet:
     @staticmethod
-    def deserialize(b: bytes) -> Message: ...
+    def deserialize(b: Union[bytes, bytearray, memoryview], msg: Message = None, verify: bool = True) -> Message: ...
     @staticmethod
     def serialize(msg: Message) -> bytes: ...
+    @staticmethod
+    def serialize_into(msg: Message, b: Union[bytearray, memoryview], offset: int = 0) -> int: ...
 
 ### -------- Typing for generated bindings ---------  ###
 